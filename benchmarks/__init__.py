@@ -0,0 +1,3 @@
+"""
+Замеры производительности
+"""
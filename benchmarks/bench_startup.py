@@ -0,0 +1,152 @@
+"""
+Замер времени запуска приложения и проверка на регрессии.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 10 --max-ms 150
+
+Импорт главного окна выполняется в отдельном процессе с -X importtime:
+выводится общее время и самые долгие модули. Скрипт завершается с кодом 1,
+если при запуске загружается модуль из DEFERRED_MODULES (они должны
+импортироваться только при первом использовании) или лучшее время импорта
+превышает --max-ms. Если доступен дисплей, дополнительно замеряется время
+до первой отрисовки окна.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+from src.core.profile_manager import ProfileManager
+
+# Модуль, импорт которого замеряется (его импортирует main.py)
+STARTUP_MODULE = "src.ui.main_window"
+# Модули, которые не должны загружаться при запуске
+DEFERRED_MODULES = (
+    "concurrent.futures",   # пул потоков параллельного обхода и поиска дубликатов
+    "ctypes",               # inotify в fs_watcher
+    "cProfile",             # профилирование в metrics
+    "pstats",
+    "hashlib",              # поиск дубликатов
+    "mmap",
+    "src.core.duplicate_finder",
+)
+# Модули, которые показываются в отчёте
+TOP_MODULES = 15
+
+
+def import_times(module: str) -> Tuple[int, Dict[str, Tuple[int, int]]]:
+    """
+    Импорт module в новом процессе с -X importtime.
+    Возвращает общее время (мкс) и {модуль: (собственное, накопленное)}
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    modules = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        if not self_time.strip().isdigit():
+            continue
+        modules[name.strip()] = (int(self_time), int(cumulative))
+        if name.strip() == module:
+            total = int(cumulative)
+    return total, modules
+
+
+def loaded_deferred(module: str) -> List[str]:
+    """Модули из DEFERRED_MODULES, загруженные импортом module"""
+    code = (f"import sys, json, {module}; "
+            f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))")
+    result = subprocess.run([sys.executable, "-c", code],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def profile_load_time(profiles: int, patterns: int) -> Tuple[float, float]:
+    """
+    Время переноса раздутого profiles.json в базу профилей и время
+    последующей загрузки (выполняется в фоновом потоке)
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        data = {"Стандартный": []}
+        for p in range(profiles):
+            data[f"profile_{p}"] = [f"pattern_{p}_{i}*" for i in range(patterns)]
+        with open(os.path.join(tmp, "profiles.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        start = time.perf_counter()
+        ProfileManager(tmp)
+        migration = time.perf_counter() - start
+        manager = ProfileManager(tmp, load=False)
+        start = time.perf_counter()
+        manager.load_profiles()
+        return migration, time.perf_counter() - start
+
+
+def first_paint_time() -> Optional[float]:
+    """Время от создания Tk до отрисовки главного окна (None без дисплея)"""
+    import tkinter as tk
+    start = time.perf_counter()
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    try:
+        from src.ui.main_window import MainWindow
+        MainWindow(root)
+        root.update()
+        return time.perf_counter() - start
+    finally:
+        root.destroy()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Замер времени запуска")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="допустимое время импорта главного окна (мс)")
+    parser.add_argument("--profiles", type=int, default=20,
+                        help="число профилей в раздутом файле профилей")
+    parser.add_argument("--patterns", type=int, default=5000,
+                        help="число шаблонов в каждом профиле")
+    args = parser.parse_args()
+
+    runs = [import_times(STARTUP_MODULE) for _ in range(args.repeat)]
+    best, modules = min(runs, key=lambda run: run[0])
+    print(f"Импорт {STARTUP_MODULE}: лучшее {best / 1000:.1f} мс "
+          f"из {args.repeat}, среднее {sum(run[0] for run in runs) / len(runs) / 1000:.1f} мс")
+    print("Самые долгие модули (накопленное время):")
+    top = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (self_time, cumulative) in top[1:TOP_MODULES + 1]:
+        print(f"  {cumulative / 1000:8.1f} мс {self_time / 1000:8.1f} мс  {name}")
+
+    migration, load = profile_load_time(args.profiles, args.patterns)
+    print(f"Профили ({args.profiles} x {args.patterns} шаблонов): перенос из JSON "
+          f"{migration * 1000:.1f} мс, загрузка {load * 1000:.1f} мс в фоновом потоке")
+
+    paint = first_paint_time()
+    if paint is not None:
+        print(f"Первая отрисовка окна: {paint * 1000:.1f} мс")
+
+    failed = False
+    deferred = loaded_deferred(STARTUP_MODULE)
+    if deferred:
+        print(f"ОШИБКА: при запуске загружаются отложенные модули: {', '.join(deferred)}",
+              file=sys.stderr)
+        failed = True
+    if args.max_ms is not None and best / 1000 > args.max_ms:
+        print(f"ОШИБКА: импорт дольше {args.max_ms:.0f} мс", file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
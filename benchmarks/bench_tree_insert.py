@@ -0,0 +1,80 @@
+"""
+Сравнение поэлементной и пакетной вставки в TreeView.
+
+Запуск из корня репозитория (нужен дисплей):
+    python -m benchmarks.bench_tree_insert --dirs 100 --files 1000
+"""
+import time
+import argparse
+import tkinter as tk
+from tkinter import ttk
+
+from src.core.directory_scanner import ScanEntry
+from src.core.tree_model import TreeModel
+from src.ui.tree_view import TreeView
+
+
+def make_entries(dirs: int, files: int) -> list:
+    """Синтетическое дерево: список (директория, записи её файлов)"""
+    return [
+        (ScanEntry(f"dir_{i}", "", True),
+         [ScanEntry(f"file_{j}.txt", "", False) for j in range(files)])
+        for i in range(dirs)
+    ]
+
+
+def add_per_item(view: TreeView, parent, entries: list) -> list:
+    """Прежний путь: один вызов tree.insert на элемент"""
+    children = view.model.add_children(parent, entries)
+    for node in children:
+        view._insert(str(parent.id), "end", node)
+    return children
+
+
+def fill(view: TreeView, tree: list, bulk: bool) -> float:
+    """Заполнение дерева, возвращает время с учётом отрисовки"""
+    view.clear()
+    root = view.add_root("/bench")
+    add = view.add_children if bulk else lambda parent, entries: add_per_item(view, parent, entries)
+    start = time.perf_counter()
+    if bulk:
+        # Как при вставке пачки результатов сканирования
+        with view.suspended():
+            dirs = add(root, [d for d, _ in tree])
+            for node, (_, files) in zip(dirs, tree):
+                add(node, files)
+    else:
+        dirs = add(root, [d for d, _ in tree])
+        for node, (_, files) in zip(dirs, tree):
+            add(node, files)
+    view.tree.update_idletasks()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Замер вставки элементов в TreeView")
+    parser.add_argument("--dirs", type=int, default=100)
+    parser.add_argument("--files", type=int, default=1000)
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise SystemExit(f"Нет дисплея для Tk: {e}")
+    frame = ttk.Frame(root)
+    frame.pack(fill=tk.BOTH, expand=True)
+    view = TreeView(frame, TreeModel())
+    tree = make_entries(args.dirs, args.files)
+    total = args.dirs * (args.files + 1)
+
+    per_item = fill(view, tree, bulk=False)
+    bulk = fill(view, tree, bulk=True)
+    print(f"Элементов: {total}")
+    print(f"Поэлементная вставка: {per_item:.3f} с")
+    print(f"Пакетная вставка: {bulk:.3f} с")
+    print(f"Ускорение: {per_item / bulk:.2f}x")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Сравнение последовательного и параллельного обхода дерева.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_walk [путь] --workers 4 --repeat 3
+
+Без пути обход выполняется по синтетическому дереву во временной директории.
+"""
+import time
+import argparse
+import tempfile
+
+from src.core.directory_scanner import DirectoryScanner
+from src.config.default_excludes import DEFAULT_EXCLUDES
+
+from .generators import make_balanced
+
+
+def time_walk(scanner: DirectoryScanner, path: str, repeat: int) -> tuple:
+    """Лучшее время обхода и его результат"""
+    best = float("inf")
+    result = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [(d, [e.path for e in entries]) for d, entries in scanner.walk(path)]
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(path: str, workers: int, repeat: int) -> None:
+    serial_time, serial = time_walk(DirectoryScanner(set(DEFAULT_EXCLUDES)), path, repeat)
+    parallel_time, parallel = time_walk(
+        DirectoryScanner(set(DEFAULT_EXCLUDES), workers=workers), path, repeat
+    )
+    entries = sum(len(items) for _, items in serial)
+    print(f"Директорий: {len(serial)}, элементов: {entries}")
+    print(f"Последовательный обход: {serial_time:.3f} с")
+    print(f"Параллельный обход ({workers} потоков): {parallel_time:.3f} с")
+    print(f"Ускорение: {serial_time / parallel_time:.2f}x")
+    if serial != parallel:
+        raise SystemExit("Порядок результатов параллельного обхода отличается!")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Замер обхода дерева каталогов")
+    parser.add_argument("path", nargs="?", help="директория для обхода")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.path:
+        run(args.path, args.workers, args.repeat)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        make_balanced(tmp)
+        run(tmp, args.workers, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Генераторы синтетических деревьев каталогов для замеров.
+
+Каждый генератор создаёт дерево в указанной (обычно временной) директории
+и возвращает число созданных элементов.
+"""
+import os
+from typing import Callable, Dict
+
+
+def _touch(path: str, size: int = 0) -> None:
+    with open(path, "wb") as f:
+        if size:
+            f.write(b"x" * size)
+
+
+def make_balanced(root: str, depth: int = 4, dirs: int = 6, files: int = 20) -> int:
+    """Сбалансированное дерево: в каждой директории dirs поддиректорий и files файлов"""
+    count = files
+    for i in range(files):
+        _touch(os.path.join(root, f"file_{i}.txt"))
+    if depth == 0:
+        return count
+    for i in range(dirs):
+        sub = os.path.join(root, f"dir_{i}")
+        os.mkdir(sub)
+        count += 1 + make_balanced(sub, depth - 1, dirs, files)
+    return count
+
+
+def make_wide(root: str, files: int = 50000) -> int:
+    """Одна директория с большим числом файлов"""
+    for i in range(files):
+        _touch(os.path.join(root, f"item_{i:06d}.dat"))
+    return files
+
+
+def make_deep(root: str, depth: int = 300, files: int = 2) -> int:
+    """Цепочка вложенных директорий с парой файлов на каждом уровне"""
+    count = 0
+    current = root
+    for level in range(depth):
+        for i in range(files):
+            _touch(os.path.join(current, f"level_{level}_{i}.txt"))
+        current = os.path.join(current, f"d{level}")
+        os.mkdir(current)
+        count += files + 1
+    return count
+
+
+def make_tiny_files(root: str, dirs: int = 100, files: int = 300) -> int:
+    """Много мелких файлов с содержимым (1-256 байт) в неглубоком дереве"""
+    count = 0
+    for d in range(dirs):
+        sub = os.path.join(root, f"pkg_{d}")
+        os.mkdir(sub)
+        count += 1
+        for i in range(files):
+            _touch(os.path.join(sub, f"mod_{i}.py"), 1 + (d * files + i) % 256)
+            count += 1
+    return count
+
+
+def make_heavy_exclusion(root: str, projects: int = 40, files: int = 50) -> int:
+    """
+    Проекты, в которых большая часть элементов попадает под DEFAULT_EXCLUDES:
+    node_modules, __pycache__, .git, build, *.pyc, *.log
+    """
+    count = 0
+    for p in range(projects):
+        project = os.path.join(root, f"project_{p}")
+        src = os.path.join(project, "src")
+        os.makedirs(src)
+        count += 2
+        for i in range(files):
+            _touch(os.path.join(src, f"module_{i}.py"))
+            _touch(os.path.join(src, f"module_{i}.pyc"))
+            _touch(os.path.join(src, f"debug_{i}.log"))
+            count += 3
+        for excluded in ("node_modules", "__pycache__", ".git", "build"):
+            sub = os.path.join(project, excluded)
+            os.mkdir(sub)
+            count += 1
+            for i in range(files):
+                _touch(os.path.join(sub, f"junk_{i}.bin"))
+                count += 1
+    return count
+
+
+# Формы деревьев по имени
+SHAPES: Dict[str, Callable[[str], int]] = {
+    "balanced": make_balanced,
+    "wide": make_wide,
+    "deep": make_deep,
+    "tiny_files": make_tiny_files,
+    "heavy_exclusion": make_heavy_exclusion,
+}
@@ -0,0 +1,172 @@
+"""
+Набор замеров сканирования и выгрузки на синтетических деревьях.
+
+Запуск из корня репозитория:
+    python -m benchmarks.run_benchmarks -o results.json
+    python -m benchmarks.run_benchmarks --shapes wide deep --repeat 5
+    python -m benchmarks.run_benchmarks --compare old.json
+
+Результаты пишутся в JSON (по умолчанию - в стандартный вывод), таблица -
+в поток ошибок. С --compare для каждого замера выводится отношение времени
+к сохранённому ранее прогону.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from src.core.directory_scanner import DirectoryScanner
+from src.core.pattern_matcher import PatternMatcher
+from src.core.structure_exporter import StructureExporter
+from src.config.default_excludes import DEFAULT_EXCLUDES
+
+from .generators import SHAPES
+
+# Версия формата файла результатов
+RESULTS_VERSION = 1
+
+
+def measure(func: Callable[[], int], repeat: int) -> dict:
+    """Лучшее и среднее время из repeat запусков; func возвращает число обработанных элементов"""
+    times = []
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = func()
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return {
+        "best": best,
+        "mean": sum(times) / len(times),
+        "repeat": repeat,
+        "items": items,
+        "items_per_sec": items / best if best else 0.0,
+    }
+
+
+def bench_scan_directory(path: str) -> Callable[[], int]:
+    scanner = DirectoryScanner(set(DEFAULT_EXCLUDES))
+    return lambda: len(scanner.scan_directory(path))
+
+
+def bench_walk(path: str, workers: int) -> Callable[[], int]:
+    scanner = DirectoryScanner(set(DEFAULT_EXCLUDES), workers=workers)
+    return lambda: sum(len(entries) for _, entries in scanner.walk(path))
+
+
+def bench_matcher(names: List[str]) -> Callable[[], int]:
+    matches = PatternMatcher(DEFAULT_EXCLUDES).matches
+
+    def run() -> int:
+        for name in names:
+            matches(name)
+        return len(names)
+    return run
+
+
+def bench_export(path: str, fmt: str, save_path: str) -> Callable[[], int]:
+    exporter = StructureExporter(DirectoryScanner(set(DEFAULT_EXCLUDES)))
+    return lambda: exporter.export_path(path, save_path, fmt)
+
+
+def collect_names(path: str) -> List[str]:
+    """Все имена дерева без фильтрации - вход для замера сопоставления шаблонов"""
+    names = []
+    for _, dirs, files in os.walk(path):
+        names.extend(dirs)
+        names.extend(files)
+    return names
+
+
+def run_shape(shape: str, tmp: str, repeat: int, workers: int) -> List[dict]:
+    """Замеры для одной формы дерева"""
+    root = os.path.join(tmp, shape)
+    os.mkdir(root)
+    created = SHAPES[shape](root)
+    save_path = os.path.join(tmp, f"{shape}.out")
+
+    cases = [
+        ("scan_directory", bench_scan_directory(root)),
+        ("walk", bench_walk(root, 1)),
+        (f"walk_parallel_{workers}", bench_walk(root, workers)),
+        ("match_default_excludes", bench_matcher(collect_names(root))),
+        ("export_txt", bench_export(root, "txt", save_path)),
+    ]
+    results = []
+    for name, func in cases:
+        result = measure(func, repeat)
+        result.update(name=name, shape=shape, created=created)
+        results.append(result)
+    return results
+
+
+def git_revision() -> Optional[str]:
+    """Текущая ревизия репозитория, если доступна"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[dict], baseline_path: str) -> None:
+    """Отношение лучшего времени к сохранённому прогону (больше 1 - медленнее)"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["shape"], r["name"]): r for r in json.load(f)["results"]}
+    print(f"\nСравнение с {baseline_path}:", file=sys.stderr)
+    for result in results:
+        old = baseline.get((result["shape"], result["name"]))
+        if old is None or not old["best"]:
+            continue
+        ratio = result["best"] / old["best"]
+        print(f"{result['shape']:<16} {result['name']:<24} {ratio:6.2f}x", file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Замеры сканирования и выгрузки")
+    parser.add_argument("--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES),
+                        help="формы синтетических деревьев")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("-o", "--output", help="файл результатов JSON (по умолчанию - stdout)")
+    parser.add_argument("--compare", metavar="FILE", help="сравнить с сохранёнными результатами")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for shape in args.shapes:
+            print(f"Форма {shape}...", file=sys.stderr)
+            results.extend(run_shape(shape, tmp, args.repeat, args.workers))
+
+    for result in results:
+        print(f"{result['shape']:<16} {result['name']:<24} {result['best']:8.4f} с "
+              f"{result['items_per_sec']:12.0f} эл/с", file=sys.stderr)
+
+    document = {
+        "version": RESULTS_VERSION,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(document, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
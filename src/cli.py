@@ -0,0 +1,281 @@
+"""
+Командная строка: пакетная генерация файлов структуры без графического интерфейса.
+
+Модуль не импортирует tkinter, поэтому быстро запускается в минимальных
+окружениях (CI, cron, контейнеры).
+"""
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Set, Tuple
+
+from .core.directory_scanner import DirectoryScanner, ScanLimits
+from .core.profile_manager import ProfileManager
+from .core.pattern_matcher import is_anchored
+from .core.scan_cache import nested_roots
+from .core.structure_exporter import StructureExporter
+from .core.export_writers import WRITERS, format_size
+from .core.duplicate_finder import (DuplicateFinder, HashCache, export_duplicates,
+                                    iter_files, wasted_total)
+from .config.default_excludes import DEFAULT_EXCLUDES
+
+DEFAULT_PROFILE = "Стандартный"
+DEFAULT_CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".dir_tree_app")
+
+
+def load_patterns(profile: str, config_dir: str, extra: Optional[List[str]] = None) -> Set[str]:
+    """Набор шаблонов исключений для профиля"""
+    if profile == DEFAULT_PROFILE:
+        patterns = set(DEFAULT_EXCLUDES)
+    else:
+        # Перенос profiles.json в базу выполняет приложение, а не выгрузка
+        manager = ProfileManager(config_dir, migrate=False)
+        if not manager.has_profile(profile):
+            raise ValueError(f"Профиль не найден: {profile}")
+        patterns = manager.get_profile(profile)
+    patterns.update(extra or ())
+    anchored = sorted(pattern for pattern in patterns if is_anchored(pattern))
+    if anchored:
+        raise ValueError(f"Шаблоны с '/' в начале не поддерживаются: {', '.join(anchored)}")
+    return patterns
+
+
+def export_root(root: str, patterns: Set[str], save_path: str, workers: int = 1,
+                stats: bool = False, fmt: str = "txt", gitignore: bool = False,
+                limits: Optional[ScanLimits] = None) -> Tuple[str, int, bool]:
+    """
+    Выгрузка структуры одного корня в файл (выполняется в отдельном процессе).
+    Возвращает корень, число узлов и признак усечения по ограничениям
+    """
+    if not os.path.isdir(root):
+        raise NotADirectoryError(f"Не является директорией: {root}")
+    scanner = DirectoryScanner(patterns, workers=workers, collect_stats=stats,
+                               use_gitignore=gitignore, limits=limits)
+    exporter = StructureExporter(scanner, with_stats=stats)
+    count = exporter.export_path(root, save_path, fmt)
+    return root, count, exporter.truncated
+
+
+def export_workspace(roots: List[str], patterns: Set[str], save_path: str, workers: int = 1,
+                     stats: bool = False, fmt: str = "txt", gitignore: bool = False,
+                     limits: Optional[ScanLimits] = None) -> Tuple[int, bool]:
+    """
+    Выгрузка нескольких корней одним документом рабочей области за один
+    проход общим сканером (шаблоны компилируются один раз, листинги
+    вложенных корней читаются с диска один раз).
+    Возвращает число узлов и признак усечения по ограничениям
+    """
+    for root in roots:
+        if not os.path.isdir(root):
+            raise NotADirectoryError(f"Не является директорией: {root}")
+    scanner = DirectoryScanner(patterns, workers=workers, collect_stats=stats,
+                               use_gitignore=gitignore, limits=limits)
+    exporter = StructureExporter(scanner, with_stats=stats)
+    count = exporter.export_workspace(roots, save_path, fmt)
+    return count, exporter.truncated
+
+
+def output_name(root: str, fmt: str = "txt") -> str:
+    """Имя файла структуры для корня"""
+    name = os.path.basename(os.path.normpath(os.path.abspath(root))) or "root"
+    return f"structure_{name}{WRITERS[fmt].extension}"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Генерация текстовой структуры каталогов без графического интерфейса"
+    )
+    parser.add_argument("roots", nargs="+", help="корневые директории")
+    parser.add_argument("-p", "--profile", default=DEFAULT_PROFILE,
+                        help="профиль исключений (по умолчанию: %(default)s)")
+    parser.add_argument("--config-dir", default=DEFAULT_CONFIG_DIR,
+                        help="директория с профилями (profiles.db)")
+    parser.add_argument("-e", "--exclude", action="append", default=[],
+                        metavar="PATTERN", help="дополнительный шаблон исключения")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("-o", "--output-dir", default=".",
+                        help="директория для файлов структуры (по файлу на корень)")
+    output.add_argument("-c", "--combined", metavar="FILE",
+                        help="один общий файл для всех корней ('-' - стандартный вывод)")
+    parser.add_argument("-w", "--workspace", action="store_true",
+                        help="выгрузить корни одним деревом рабочей области за один проход "
+                             "(в файл -c или structure_workspace в -o)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="число процессов (по умолчанию: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="число потоков чтения директорий в каждом процессе")
+    parser.add_argument("-f", "--format", choices=list(WRITERS), default="txt",
+                        help="формат выгрузки (по умолчанию: %(default)s)")
+    parser.add_argument("--stats", action="store_true",
+                        help="добавить размеры файлов и итоги по директориям")
+    parser.add_argument("--gitignore", action="store_true",
+                        help="учитывать правила .gitignore/.ignore в дереве")
+    limits = parser.add_argument_group("ограничения обхода")
+    limits.add_argument("--max-depth", type=int, metavar="N",
+                        help="максимальная глубина (1 - только содержимое корня)")
+    limits.add_argument("--max-entries", type=int, metavar="N",
+                        help="максимальное число элементов на корень")
+    limits.add_argument("--timeout", type=float, metavar="SEC",
+                        help="время обхода одного корня в секундах")
+    limits.add_argument("-L", "--follow-symlinks", action="store_true",
+                        help="заходить в директории по символическим ссылкам")
+    limits.add_argument("-x", "--one-file-system", action="store_true",
+                        help="не заходить в точки монтирования других файловых систем")
+    parser.add_argument("--duplicates", metavar="FILE",
+                        help="отчёт о дубликатах файлов по всем корням (.json или текст)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        patterns = load_patterns(args.profile, args.config_dir, args.exclude)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+
+    limits = ScanLimits(
+        max_depth=args.max_depth,
+        max_entries=args.max_entries,
+        timeout=args.timeout,
+        follow_symlinks=args.follow_symlinks,
+        cross_mounts=not args.one_file_system
+    )
+
+    if args.workspace:
+        return _export_workspace(args, patterns, limits)
+
+    tmp_dir = None
+    if args.combined:
+        tmp_dir = tempfile.mkdtemp(prefix="dir_tree_")
+        targets = [os.path.join(tmp_dir, f"{i}.txt") for i in range(len(args.roots))]
+    else:
+        os.makedirs(args.output_dir, exist_ok=True)
+        targets = [os.path.join(args.output_dir, output_name(root, args.format))
+                   for root in args.roots]
+
+    failed = []
+    try:
+        jobs = max(1, min(args.jobs, len(args.roots)))
+        if jobs == 1:
+            results = []
+            for root, target in zip(args.roots, targets):
+                try:
+                    results.append(export_root(root, patterns, target, args.workers, args.stats,
+                                               args.format, args.gitignore, limits))
+                except Exception as e:
+                    results.append(e)
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = [
+                    pool.submit(export_root, root, patterns, target, args.workers,
+                                args.stats, args.format, args.gitignore, limits)
+                    for root, target in zip(args.roots, targets)
+                ]
+                results = [f.exception() or f.result() for f in futures]
+
+        for root, target, result in zip(args.roots, targets, results):
+            if isinstance(result, BaseException):
+                failed.append(root)
+                print(f"Ошибка при обработке {root}: {str(result)}", file=sys.stderr)
+            else:
+                if result[2]:
+                    print(f"{root}: обход остановлен по ограничениям, структура неполная",
+                          file=sys.stderr)
+                if not args.combined:
+                    print(f"{root}: {result[1]} строк -> {target}", file=sys.stderr)
+
+        if args.combined:
+            written = [t for root, t in zip(args.roots, targets) if root not in failed]
+            writer = WRITERS[args.format]
+            if len(args.roots) > 1:
+                _combine(written, args.combined, writer.separator,
+                         writer.combined_prefix, writer.combined_suffix)
+            else:
+                _combine(written, args.combined, writer.separator)
+        if args.duplicates:
+            roots = [root for root in args.roots if root not in failed]
+            _report_duplicates(roots, patterns, args.config_dir, args.workers,
+                               args.duplicates, args.gitignore, limits)
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return 1 if failed else 0
+
+
+def _export_workspace(args: argparse.Namespace, patterns: Set[str], limits: ScanLimits) -> int:
+    """Выгрузка всех корней одним документом рабочей области"""
+    extension = WRITERS[args.format].extension
+    if args.combined and args.combined != "-":
+        target = args.combined
+    elif args.combined:
+        target = None
+    else:
+        os.makedirs(args.output_dir, exist_ok=True)
+        target = os.path.join(args.output_dir, f"structure_workspace{extension}")
+    try:
+        if target is None:
+            # Стандартный вывод: выгрузка во временный файл и копирование
+            with tempfile.TemporaryDirectory(prefix="dir_tree_") as tmp_dir:
+                part = os.path.join(tmp_dir, f"workspace{extension}")
+                count, truncated = export_workspace(args.roots, patterns, part, args.workers,
+                                                    args.stats, args.format, args.gitignore,
+                                                    limits)
+                _combine([part], "-")
+        else:
+            count, truncated = export_workspace(args.roots, patterns, target, args.workers,
+                                                args.stats, args.format, args.gitignore, limits)
+    except Exception as e:
+        print(f"Ошибка при обработке рабочей области: {str(e)}", file=sys.stderr)
+        return 1
+    if truncated:
+        print("Обход остановлен по ограничениям, структура неполная", file=sys.stderr)
+    if target is not None:
+        print(f"Рабочая область ({len(args.roots)} корней): {count} строк -> {target}",
+              file=sys.stderr)
+    if args.duplicates:
+        # Файлы вложенных корней уже входят во внешние
+        nested = nested_roots(args.roots)
+        roots = [root for root in args.roots if root not in nested]
+        _report_duplicates(roots, patterns, args.config_dir, args.workers,
+                           args.duplicates, args.gitignore, limits)
+    return 0
+
+
+def _report_duplicates(roots: List[str], patterns: Set[str], config_dir: str,
+                       workers: int, save_path: str, gitignore: bool = False,
+                       limits: Optional[ScanLimits] = None) -> None:
+    """Поиск дубликатов среди файлов всех корней и запись отчёта"""
+    scanner = DirectoryScanner(patterns, workers=workers, use_gitignore=gitignore,
+                               limits=limits)
+    finder = DuplicateFinder(max(workers, 4), HashCache(config_dir))
+    groups = finder.find(itertools.chain.from_iterable(
+        iter_files(scanner, root) for root in roots
+    ))
+    export_duplicates(groups, save_path)
+    print(f"Групп дубликатов: {len(groups)}, лишнее место: "
+          f"{format_size(wasted_total(groups))} -> {save_path}", file=sys.stderr)
+
+
+def _combine(parts: List[str], combined: str, separator: str = "\n\n",
+             prefix: str = "", suffix: str = "") -> None:
+    """Потоковое объединение файлов структуры в один документ"""
+    out = sys.stdout if combined == "-" else open(combined, "w", encoding="utf-8")
+    try:
+        out.write(prefix)
+        for i, part in enumerate(parts):
+            if i:
+                out.write(separator)
+            with open(part, "r", encoding="utf-8") as f:
+                shutil.copyfileobj(f, out)
+        out.write(suffix)
+        if combined == "-":
+            out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
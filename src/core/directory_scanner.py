@@ -1,34 +1,393 @@
 import os
-from typing import Set, List, Optional
+import time
+import threading
+from typing import Dict, Set, List, Optional, NamedTuple, Iterator, Tuple, TYPE_CHECKING
+
+from .pattern_matcher import MATCHER_CACHE
+from .gitignore import CHAIN_NAMES, IgnoreStack
+
+if TYPE_CHECKING:
+    from .metrics import ScanMetrics
+    from .scan_cache import ScanCache, SharedListings
+
+# Число директорий, читаемых заранее, на один поток параллельного обхода
+PREFETCH_PER_WORKER = 4
+
+
+class ScanEntry(NamedTuple):
+    """Компактная запись об элементе каталога"""
+    name: str
+    path: str
+    is_dir: bool
+    # Заполняются только при collect_stats
+    size: int = 0
+    mtime: float = 0.0
+    # Символическая ссылка (is_dir при этом относится к цели ссылки)
+    is_link: bool = False
+
+
+class ScanLimits(NamedTuple):
+    """Ограничения обхода дерева; None - без ограничения"""
+    # Глубина: 1 - только содержимое корня
+    max_depth: Optional[int] = None
+    # Общее число элементов
+    max_entries: Optional[int] = None
+    # Время обхода в секундах
+    timeout: Optional[float] = None
+    # Заходить в директории по символическим ссылкам
+    follow_symlinks: bool = False
+    # Заходить в точки монтирования других файловых систем
+    cross_mounts: bool = True
+
+
+class ScanBudget:
+    """
+    Состояние ограничений одного обхода. Если обход остановлен или какая-то
+    директория не прочитана из-за лимита глубины, числа элементов или времени,
+    устанавливается truncated. Пропуск символических ссылок и точек монтирования
+    по настройкам усечением не считается.
+    """
+
+    def __init__(self, limits: ScanLimits, root_path: str):
+        self.limits = limits
+        self.entries = 0
+        self.truncated = False
+        self.deadline = time.monotonic() + limits.timeout if limits.timeout is not None else None
+        # (st_dev, st_ino) пройденных директорий - защита от циклов по ссылкам
+        self._visited: Set[Tuple[int, int]] = set()
+        self._root_dev: Optional[int] = None
+        if limits.follow_symlinks or not limits.cross_mounts:
+            try:
+                st = os.stat(root_path)
+                self._root_dev = st.st_dev
+                self._visited.add((st.st_dev, st.st_ino))
+            except OSError:
+                pass
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        Обход пора остановить: исчерпан лимит элементов или времени.
+        Проверяется перед чтением очередной директории, поэтому
+        исчерпание означает, что обход усечён
+        """
+        if self.limits.max_entries is not None and self.entries >= self.limits.max_entries:
+            self.truncated = True
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.truncated = True
+            return True
+        return False
+
+    def take(self, entries: List[ScanEntry]) -> List[ScanEntry]:
+        """Учёт прочитанных записей; сверх лимита записи отбрасываются"""
+        max_entries = self.limits.max_entries
+        if max_entries is not None and self.entries + len(entries) > max_entries:
+            entries = entries[:max(0, max_entries - self.entries)]
+            self.truncated = True
+        self.entries += len(entries)
+        return entries
+
+    def can_descend(self, path: str, depth: int, is_link: Optional[bool] = None) -> bool:
+        """
+        Можно ли спускаться в директорию path, лежащую на глубине depth (корень - 0).
+        is_link = None - проверить, не является ли path ссылкой, на диске.
+        """
+        limits = self.limits
+        if limits.max_depth is not None and depth >= limits.max_depth:
+            self.truncated = True
+            return False
+        if is_link is None:
+            is_link = os.path.islink(path)
+        if is_link and not limits.follow_symlinks:
+            return False
+        if not limits.cross_mounts and self._root_dev is not None:
+            try:
+                if os.stat(path).st_dev != self._root_dev:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def enter(self, path: str) -> bool:
+        """
+        Отметка директории как прочитанной непосредственно перед чтением.
+        False - директория уже пройдена по другому пути (цикл по ссылкам).
+        Без перехода по ссылкам циклы невозможны, и проверка не выполняется.
+        """
+        if not self.limits.follow_symlinks:
+            return True
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        key = (st.st_dev, st.st_ino)
+        if key in self._visited:
+            return False
+        self._visited.add(key)
+        return True
+
 
 class DirectoryScanner:
-    def __init__(self, excluded_patterns: Set[str]):
+    def __init__(self, excluded_patterns: Set[str], workers: int = 1,
+                 cache: Optional["ScanCache"] = None, collect_stats: bool = False,
+                 use_gitignore: bool = False, limits: Optional[ScanLimits] = None):
         self.excluded_patterns = excluded_patterns
+        # Число потоков для параллельного обхода (1 - последовательный обход)
+        self.workers = workers
+        # Кэш листингов; при revalidate_cache = False листинги, проверенные
+        # в этой сессии, используются без проверки mtime (повторная фильтрация
+        # после смены профиля)
+        self.cache = cache
+        self.revalidate_cache = True
+        # Сбор размеров и времени изменения файлов во время обхода
+        self.collect_stats = collect_stats
+        # Учёт правил .gitignore/.ignore, встреченных при спуске по дереву
+        self.ignore_stack = IgnoreStack()
+        self.use_gitignore = use_gitignore
+        # Ограничения обхода (см. ScanLimits)
+        self.limits = limits or ScanLimits()
+        # Замер времени по фазам listing/stat/filter (см. ScanMetrics)
+        self.metrics: Optional["ScanMetrics"] = None
+        # Листинги, общие для одновременных обходов вложенных корней рабочей области
+        self.shared_listings: Optional["SharedListings"] = None
 
-    def should_exclude(self, name: str) -> bool:
-        return name in self.excluded_patterns
+    @property
+    def excluded_patterns(self) -> Set[str]:
+        return self._excluded_patterns
 
-    def scan_directory(self, path: str) -> List[tuple]:
+    @excluded_patterns.setter
+    def excluded_patterns(self, patterns: Set[str]) -> None:
+        self._excluded_patterns = patterns
+        self.matcher = MATCHER_CACHE.get(patterns)
+
+    @property
+    def use_gitignore(self) -> bool:
+        return self._use_gitignore
+
+    @use_gitignore.setter
+    def use_gitignore(self, enabled: bool) -> None:
+        # Пока учёт был выключен, файлы правил могли измениться:
+        # цепочки строятся заново
+        self._use_gitignore = enabled
+        self.ignore_stack.clear()
+
+    def update_patterns(self) -> None:
         """
-        Сканирует директорию и возвращает список кортежей (имя, полный путь, тип)
-        где тип - это 'dir' для директорий и 'file' для файлов
+        Перекомпиляция шаблонов после изменения набора на месте. Кэш ключуется
+        содержимым набора, поэтому запись прежнего набора остаётся верной
+        и вытесняется по LRU
+        """
+        self.matcher = MATCHER_CACHE.get(self._excluded_patterns)
+        self.ignore_stack.clear()
+
+    def should_exclude(self, name: str, path: Optional[str] = None) -> bool:
+        return self.matcher.matches(name, path)
+
+    def scan_entries(self, path: str) -> List[ScanEntry]:
+        """
+        Сканирует директорию через os.scandir и возвращает отсортированный список
+        записей ScanEntry (сначала директории, затем файлы, без учёта регистра).
+        Тип элемента берётся из кэша DirEntry, повторных вызовов stat не делается.
+        При use_gitignore игнорируемые элементы отбрасываются здесь же, поэтому
+        в игнорируемые директории обход не спускается.
         """
-        result = []
         try:
-            items = sorted(os.listdir(path), 
-                         key=lambda x: (not os.path.isdir(os.path.join(path, x)), x.lower()))
-            
-            for item in items:
-                if self.should_exclude(item):
-                    continue
-                    
-                full_path = os.path.join(path, item)
-                item_type = 'dir' if os.path.isdir(full_path) else 'file'
-                result.append((item, full_path, item_type))
-                
+            listing = self._read_listing(path)
         except PermissionError:
             print(f"Отказано в доступе: {path}")
+            return []
         except Exception as e:
             print(f"Ошибка при чтении {path}: {str(e)}")
-            
-        return result 
\ No newline at end of file
+            return []
+
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+        matches = self.matcher.matches
+        entries = [entry for entry in listing if not matches(entry.name, entry.path)]
+        if self.use_gitignore:
+            names = {entry.name for entry in listing if entry.name in CHAIN_NAMES}
+            chain = self.ignore_stack.chain(path, names)
+            if chain:
+                is_ignored = IgnoreStack.is_ignored
+                entries = [entry for entry in entries
+                           if not is_ignored(chain, entry.path, entry.name, entry.is_dir)]
+        if metrics is not None:
+            metrics.add("filter", time.perf_counter() - start)
+            metrics.count("dirs")
+            metrics.count("entries", len(entries))
+        return entries
+
+    def _read_listing(self, path: str) -> List[ScanEntry]:
+        """Полный отсортированный листинг директории (из общих листингов, кэша или с диска)"""
+        shared = self.shared_listings
+        if shared is None or not shared.covers(path):
+            return self._read_listing_cached(path)
+        listing = shared.get(path)
+        if listing is None:
+            listing = self._read_listing_cached(path)
+            shared.put(path, listing)
+        elif self.metrics is not None:
+            self.metrics.count("cache_hits")
+        return listing
+
+    def _read_listing_cached(self, path: str) -> List[ScanEntry]:
+        """Полный отсортированный листинг директории (из кэша или с диска)"""
+        st = None
+        collect_stats = self.collect_stats
+        metrics = self.metrics
+        if self.cache is not None:
+            # Размеры файлов меняются без изменения mtime директории,
+            # поэтому при сборе статистики листинг всегда читается с диска
+            if not collect_stats:
+                cached = self.cache.get(path, validate=self.revalidate_cache)
+                if cached is not None:
+                    if metrics is not None:
+                        metrics.count("cache_hits")
+                    return cached
+            st = os.stat(path)
+
+        if metrics is not None:
+            start = time.perf_counter()
+            stat_time = 0.0
+        result = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if collect_stats:
+                    try:
+                        if metrics is not None:
+                            stat_start = time.perf_counter()
+                            entry_stat = entry.stat(follow_symlinks=False)
+                            stat_time += time.perf_counter() - stat_start
+                        else:
+                            entry_stat = entry.stat(follow_symlinks=False)
+                        size = 0 if is_dir else entry_stat.st_size
+                        result.append(ScanEntry(entry.name, entry.path, is_dir, size,
+                                                entry_stat.st_mtime, entry.is_symlink()))
+                        continue
+                    except OSError:
+                        pass
+                result.append(ScanEntry(entry.name, entry.path, is_dir,
+                                        is_link=entry.is_symlink()))
+        result.sort(key=lambda e: (not e.is_dir, e.name.lower()))
+        if metrics is not None:
+            metrics.add("listing", time.perf_counter() - start - stat_time)
+            if collect_stats:
+                metrics.add("stat", stat_time)
+
+        if st is not None:
+            self.cache.put(path, st, result)
+        return result
+
+    @property
+    def profiling(self) -> bool:
+        """Включено ли профилирование cProfile (см. ScanMetrics.profile)"""
+        return self.metrics is not None and self.metrics.profile
+
+    def save_cache(self) -> None:
+        """Запись кэша листингов на диск"""
+        if self.cache is not None:
+            self.cache.save()
+
+    def scan_directory(self, path: str) -> List[tuple]:
+        """
+        Сканирует директорию и возвращает список кортежей (имя, полный путь, тип)
+        где тип - это 'dir' для директорий и 'file' для файлов
+        """
+        return [
+            (entry.name, entry.path, 'dir' if entry.is_dir else 'file')
+            for entry in self.scan_entries(path)
+        ]
+
+    def budget(self, path: str) -> ScanBudget:
+        """Новое состояние ограничений для обхода от path"""
+        return ScanBudget(self.limits, path)
+
+    def walk(self, path: str, cancel: Optional[threading.Event] = None,
+             budget: Optional[ScanBudget] = None) -> Iterator[Tuple[str, List[ScanEntry]]]:
+        """
+        Итеративный обход дерева в глубину. Для каждой директории возвращает
+        пару (путь, отсортированные записи); родитель всегда идёт раньше потомков.
+        Обход прерывается, как только установлен флаг cancel, и останавливается
+        по ограничениям self.limits (результат - в budget.truncated).
+        При workers > 1 директории читаются параллельно, порядок результатов
+        при этом тот же, что и у последовательного обхода. Под cProfile обход
+        всегда последовательный: профилировщик видит только свой поток.
+        """
+        if budget is None:
+            budget = self.budget(path)
+        if self.workers > 1 and not self.profiling:
+            yield from self._walk_parallel(path, cancel, budget)
+            return
+
+        stack = [(path, 0)]
+        while stack:
+            if cancel is not None and cancel.is_set():
+                return
+            if budget.exhausted:
+                budget.truncated = True
+                return
+            current, depth = stack.pop()
+            if depth and not budget.enter(current):
+                continue
+            entries = budget.take(self.scan_entries(current))
+            yield current, entries
+            subdirs = self._subdirs(entries, depth + 1, budget)
+            stack.extend(reversed(subdirs))
+
+    @staticmethod
+    def _subdirs(entries: List[ScanEntry], depth: int,
+                 budget: ScanBudget) -> List[Tuple[str, int]]:
+        """Поддиректории, в которые можно спуститься, с их глубиной"""
+        return [(entry.path, depth) for entry in entries
+                if entry.is_dir and budget.can_descend(entry.path, depth, entry.is_link)]
+
+    def _walk_parallel(self, path: str, cancel: Optional[threading.Event],
+                       budget: ScanBudget) -> Iterator[Tuple[str, List[ScanEntry]]]:
+        """
+        Параллельный обход: стек обхода в глубину общий, а пул потоков заранее
+        читает директории с его вершины - те, что будут выданы следующими.
+        В работе одновременно не больше workers * PREFETCH_PER_WORKER чтений,
+        поэтому широкие деревья не заполняют очередь пула тысячами задач.
+        Результаты выдаются в порядке обхода в глубину, поэтому вывод не
+        зависит от числа потоков.
+        """
+        # concurrent.futures импортируется только при параллельном обходе:
+        # это заметная доля времени запуска приложения
+        from concurrent.futures import Future, ThreadPoolExecutor
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        limit = self.workers * PREFETCH_PER_WORKER
+        pending: Dict[str, Future] = {}
+        stack = [(path, 0)]
+        try:
+            while stack:
+                if cancel is not None and cancel.is_set():
+                    return
+                if budget.exhausted:
+                    budget.truncated = True
+                    return
+                # Вершина стека - ближайшие в порядке обхода директории
+                for subdir, _ in reversed(stack[-limit:]):
+                    if len(pending) >= limit:
+                        break
+                    if subdir not in pending:
+                        pending[subdir] = pool.submit(self.scan_entries, subdir)
+                current, depth = stack.pop()
+                future = pending.pop(current, None)
+                if depth and not budget.enter(current):
+                    if future is not None:
+                        future.cancel()
+                    continue
+                listing = future.result() if future is not None else self.scan_entries(current)
+                entries = budget.take(listing)
+                yield current, entries
+                stack.extend(reversed(self._subdirs(entries, depth + 1, budget)))
+        finally:
+            for future in pending.values():
+                future.cancel()
+            pool.shutdown(wait=False)
@@ -0,0 +1,230 @@
+import os
+import json
+import mmap
+import stat
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .directory_scanner import DirectoryScanner
+from .export_writers import format_size
+
+# Версия формата файла кэша хэшей
+CACHE_VERSION = 1
+# Размер блока при хэшировании файла
+CHUNK_SIZE = 1 << 20
+# Предел числа записей кэша хэшей: при превышении сохраняются только
+# записи, использованные в текущем сеансе
+CACHE_LIMIT = 500000
+
+
+class DuplicateGroup(NamedTuple):
+    """Группа файлов с одинаковым содержимым"""
+    size: int
+    digest: str
+    paths: List[str]
+
+    @property
+    def wasted(self) -> int:
+        """Место, занятое лишними копиями"""
+        return self.size * (len(self.paths) - 1)
+
+
+class HashCache:
+    """
+    Кэш хэшей содержимого файлов.
+
+    Ключ - inode, mtime и размер файла: пока они не изменились, файл
+    повторно не читается. Путь в ключ не входит, поэтому переименование
+    или перемещение файла в пределах тома кэш не сбрасывает.
+    """
+
+    def __init__(self, config_dir: str):
+        self.cache_file = os.path.join(config_dir, "hash_cache.json")
+        self._hashes: Dict[str, str] = {}
+        self._used: set = set()
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(st: os.stat_result) -> str:
+        return f"{st.st_ino}:{st.st_mtime_ns}:{st.st_size}"
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    self._hashes.update(data.get("hashes", {}))
+            except Exception:
+                pass
+            self._loaded = True
+
+    def get(self, st: os.stat_result) -> Optional[str]:
+        """Хэш файла из кэша или None"""
+        self._ensure_loaded()
+        key = self.key(st)
+        digest = self._hashes.get(key)
+        if digest is not None:
+            self._used.add(key)
+        return digest
+
+    def put(self, st: os.stat_result, digest: str) -> None:
+        """Сохранение хэша файла в кэше"""
+        self._ensure_loaded()
+        key = self.key(st)
+        self._hashes[key] = digest
+        self._used.add(key)
+        self._dirty = True
+
+    def save(self) -> None:
+        """Атомарная запись кэша на диск"""
+        if not self._dirty:
+            return
+        hashes = self._hashes.copy()
+        if len(hashes) > CACHE_LIMIT:
+            hashes = {key: hashes[key] for key in self._used if key in hashes}
+        tmp_file = self.cache_file + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({"version": CACHE_VERSION, "hashes": hashes}, f,
+                          separators=(',', ':'))
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except Exception as e:
+            print(f"Не удалось сохранить кэш хэшей: {str(e)}")
+
+
+class DuplicateFinder:
+    """
+    Поиск файлов с одинаковым содержимым.
+
+    Файлы сначала группируются по размеру; хэшируются только файлы
+    из групп, где больше одного файла. Хэширование идёт блоками через
+    mmap в пуле потоков (hashlib отпускает GIL на больших блоках).
+    Жёсткие ссылки на один inode считаются одним файлом, пустые файлы
+    не учитываются.
+    """
+
+    def __init__(self, workers: int = 4, cache: Optional[HashCache] = None):
+        self.workers = max(1, workers)
+        self.cache = cache
+        self.files_hashed = 0
+        self.bytes_hashed = 0
+        self._lock = threading.Lock()
+
+    def find(self, paths: Iterable[str],
+             cancel: Optional[threading.Event] = None) -> List[DuplicateGroup]:
+        """Группы дубликатов среди файлов paths, по убыванию лишнего места"""
+        by_size: Dict[int, List[Tuple[str, os.stat_result]]] = {}
+        seen_inodes = set()
+        for path in paths:
+            if cancel is not None and cancel.is_set():
+                return []
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue
+            if not stat.S_ISREG(st.st_mode) or not st.st_size:
+                continue
+            inode = (st.st_dev, st.st_ino)
+            if inode in seen_inodes:
+                continue
+            seen_inodes.add(inode)
+            by_size.setdefault(st.st_size, []).append((path, st))
+
+        candidates = [item for items in by_size.values() if len(items) > 1 for item in items]
+        by_digest: Dict[Tuple[int, str], List[str]] = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for (path, st), digest in zip(candidates,
+                                          pool.map(lambda item: self._digest(*item, cancel),
+                                                   candidates)):
+                if digest is not None:
+                    by_digest.setdefault((st.st_size, digest), []).append(path)
+        if cancel is not None and cancel.is_set():
+            return []
+        if self.cache is not None:
+            self.cache.save()
+
+        groups = [DuplicateGroup(size, digest, sorted(group))
+                  for (size, digest), group in by_digest.items() if len(group) > 1]
+        groups.sort(key=lambda group: (-group.wasted, group.paths[0]))
+        return groups
+
+    def _digest(self, path: str, st: os.stat_result,
+                cancel: Optional[threading.Event]) -> Optional[str]:
+        """Хэш файла с учётом кэша; None, если файл не удалось прочитать"""
+        if cancel is not None and cancel.is_set():
+            return None
+        if self.cache is not None:
+            digest = self.cache.get(st)
+            if digest is not None:
+                return digest
+        try:
+            digest = self.hash_file(path)
+        except OSError:
+            return None
+        with self._lock:
+            self.files_hashed += 1
+            self.bytes_hashed += st.st_size
+        if self.cache is not None:
+            self.cache.put(st, digest)
+        return digest
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        """Хэш содержимого файла, чтение блоками по CHUNK_SIZE"""
+        h = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # Пустые и специальные файлы не отображаются в память
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    h.update(chunk)
+                return h.hexdigest()
+            with mapped, memoryview(mapped) as view:
+                for offset in range(0, len(view), CHUNK_SIZE):
+                    h.update(view[offset:offset + CHUNK_SIZE])
+        return h.hexdigest()
+
+
+def iter_files(scanner: DirectoryScanner, root_path: str) -> Iterator[str]:
+    """Пути файлов дерева с учётом шаблонов исключений сканера"""
+    for _, entries in scanner.walk(root_path):
+        for entry in entries:
+            if not entry.is_dir:
+                yield entry.path
+
+
+def wasted_total(groups: List[DuplicateGroup]) -> int:
+    """Суммарное место, занятое лишними копиями"""
+    return sum(group.wasted for group in groups)
+
+
+def export_duplicates(groups: List[DuplicateGroup], save_path: str) -> None:
+    """Запись отчёта о дубликатах: JSON для .json, иначе текст"""
+    with open(save_path, "w", encoding="utf-8") as f:
+        if save_path.lower().endswith(".json"):
+            json.dump({
+                "wasted": wasted_total(groups),
+                "groups": [{"size": group.size, "digest": group.digest,
+                            "wasted": group.wasted, "paths": group.paths}
+                           for group in groups],
+            }, f, ensure_ascii=False, indent=2)
+            return
+        f.write(f"Групп дубликатов: {len(groups)}, "
+                f"лишнее место: {format_size(wasted_total(groups))}\n")
+        for group in groups:
+            f.write(f"\n{format_size(group.size)} x {len(group.paths)} "
+                    f"(лишних: {format_size(group.wasted)})\n")
+            for path in group.paths:
+                f.write(f"    {path}\n")
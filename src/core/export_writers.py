@@ -0,0 +1,250 @@
+"""
+Форматы выгрузки структуры каталогов.
+
+Каждый формат - класс-писатель, который получает узлы дерева по одному
+в порядке обхода в глубину и сразу пишет их в поток. Весь документ
+в памяти не собирается, поэтому объём выгрузки не ограничен памятью.
+"""
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, TextIO, Type
+
+from .tree_model import TreeNode
+
+SIZE_UNITS = ("Б", "КБ", "МБ", "ГБ", "ТБ")
+
+
+def format_size(size: int) -> str:
+    """Размер в удобочитаемом виде"""
+    value = float(size)
+    for unit in SIZE_UNITS:
+        if value < 1024 or unit == SIZE_UNITS[-1]:
+            break
+        value /= 1024
+    return f"{int(value)} {unit}" if unit == SIZE_UNITS[0] else f"{value:.1f} {unit}"
+
+
+def format_mtime(mtime: float) -> str:
+    """Время изменения в удобочитаемом виде"""
+    return datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M") if mtime else ""
+
+
+def format_stats(node: TreeNode) -> str:
+    """
+    Сведения о размере узла: для файла - размер и время изменения,
+    для загруженной директории - итоги по поддереву
+    """
+    if not node.is_dir:
+        mtime = format_mtime(node.mtime)
+        return f"{format_size(node.size)}, {mtime}" if mtime else format_size(node.size)
+    if not node.loaded:
+        return ""
+    return f"{format_size(node.size)}, файлов: {node.files}, папок: {node.dirs}"
+
+
+class StructureWriter:
+    """
+    Базовый писатель структуры.
+
+    Порядок вызовов: begin(), затем write() для каждого узла в порядке
+    обхода в глубину, затем end(). depth - глубина узла (у корня 0),
+    last - является ли узел последним среди потомков своего родителя.
+    """
+
+    # Расширение файла и название формата для диалога сохранения
+    extension = ".txt"
+    title = "Текст с отступами"
+    # Разделитель при объединении выгрузок нескольких корней в один файл
+    separator = "\n\n"
+    # Начало и конец объединённой выгрузки нескольких корней
+    combined_prefix = ""
+    combined_suffix = ""
+
+    def __init__(self, out: TextIO, with_stats: bool = False, indent: str = "    "):
+        self.out = out
+        self.with_stats = with_stats
+        self.indent = indent
+
+    def begin(self) -> None:
+        pass
+
+    def write(self, depth: int, node: TreeNode, last: bool) -> None:
+        raise NotImplementedError
+
+    def end(self) -> None:
+        pass
+
+    def label(self, node: TreeNode) -> str:
+        """Имя узла с итогами в скобках (если они включены)"""
+        if self.with_stats:
+            stats = format_stats(node)
+            if stats:
+                return f"{node.display_name} ({stats})"
+        return node.display_name
+
+
+class LineWriter(StructureWriter):
+    """Писатель построчных форматов: строки разделяются переводом строки"""
+
+    def begin(self) -> None:
+        self._first = True
+
+    def write(self, depth: int, node: TreeNode, last: bool) -> None:
+        if self._first:
+            self._first = False
+        else:
+            self.out.write("\n")
+        self.out.write(self.line(depth, node, last))
+
+    def line(self, depth: int, node: TreeNode, last: bool) -> str:
+        raise NotImplementedError
+
+
+class TextWriter(LineWriter):
+    """Текст с отступами для уровней вложенности"""
+
+    def line(self, depth: int, node: TreeNode, last: bool) -> str:
+        return f"{self.indent * depth}{self.label(node)}"
+
+
+class BoxTreeWriter(LineWriter):
+    """Дерево с псевдографикой, как в README"""
+
+    extension = ".txt"
+    title = "Дерево с псевдографикой"
+
+    def begin(self) -> None:
+        super().begin()
+        # Префиксы уровней: продолжается ли ветка предка ниже
+        self._prefixes: List[str] = []
+
+    def line(self, depth: int, node: TreeNode, last: bool) -> str:
+        label = self.label(node)
+        if node.is_dir and node.parent is not None:
+            name = node.display_name
+            label = f"{name}/{label[len(name):]}"
+        if depth == 0:
+            return label
+        del self._prefixes[depth - 1:]
+        line = "".join(self._prefixes) + ("└── " if last else "├── ") + label
+        self._prefixes.append("    " if last else "│   ")
+        return line
+
+
+class MarkdownWriter(LineWriter):
+    """Вложенный маркированный список Markdown"""
+
+    extension = ".md"
+    title = "Markdown"
+
+    def line(self, depth: int, node: TreeNode, last: bool) -> str:
+        name = node.display_name + ("/" if node.is_dir else "")
+        line = f"{'  ' * depth}- `{name}`"
+        if self.with_stats:
+            stats = format_stats(node)
+            if stats:
+                line = f"{line} ({stats})"
+        return line
+
+
+def _node_fields(node: TreeNode, with_stats: bool) -> Dict[str, object]:
+    """Поля узла для JSON-форматов"""
+    fields: Dict[str, object] = {
+        "name": node.display_name,
+        "type": "dir" if node.is_dir else "file",
+    }
+    if with_stats:
+        fields["size"] = node.size
+        if node.mtime:
+            fields["mtime"] = node.mtime
+        if node.is_dir:
+            fields["files"] = node.files
+            fields["dirs"] = node.dirs
+    return fields
+
+
+class JsonWriter(StructureWriter):
+    """
+    Вложенный JSON: у директорий поле children со списком потомков.
+    Скобки закрываются по мере подъёма по дереву, документ целиком
+    в памяти не собирается.
+    """
+
+    extension = ".json"
+    title = "JSON"
+    # Выгрузки нескольких корней объединяются в массив
+    separator = ",\n"
+    combined_prefix = "[\n"
+    combined_suffix = "\n]"
+
+    def begin(self) -> None:
+        # Число открытых списков children
+        self._open = 0
+        self._comma = False
+
+    def write(self, depth: int, node: TreeNode, last: bool) -> None:
+        self._close_to(depth)
+        if self._comma:
+            self.out.write(",")
+        if depth:
+            self.out.write("\n")
+        self.out.write(self.indent * depth)
+        body = json.dumps(_node_fields(node, self.with_stats), ensure_ascii=False)
+        if node.is_dir:
+            self.out.write(body[:-1] + ', "children": [')
+            self._open += 1
+            self._comma = False
+        else:
+            self.out.write(body)
+            self._comma = True
+
+    def end(self) -> None:
+        self._close_to(0)
+
+    def _close_to(self, depth: int) -> None:
+        """Закрытие директорий глубже depth"""
+        while self._open > depth:
+            self.out.write("]}")
+            self._open -= 1
+            self._comma = True
+
+
+class NdjsonWriter(LineWriter):
+    """
+    NDJSON: по одному JSON-объекту на строку, путь относительно корня.
+    Поле root - корневая директория записи, по нему различаются записи
+    разных корней в объединённой выгрузке (у служебного корня рабочей
+    области поля нет)
+    """
+
+    extension = ".ndjson"
+    title = "NDJSON"
+    separator = "\n"
+
+    def begin(self) -> None:
+        super().begin()
+        self._names: List[str] = []
+        self._root: Optional[str] = None
+
+    def line(self, depth: int, node: TreeNode, last: bool) -> str:
+        if depth:
+            del self._names[depth - 1:]
+            self._names.append(node.display_name)
+        if not depth or node.parent.is_workspace:
+            self._root = None if node.is_workspace else node.path
+        fields = _node_fields(node, self.with_stats)
+        if self._root is not None:
+            fields["root"] = self._root
+        fields["path"] = "/".join(self._names) if depth else "."
+        fields["depth"] = depth
+        return json.dumps(fields, ensure_ascii=False)
+
+
+# Доступные форматы выгрузки по имени
+WRITERS: Dict[str, Type[StructureWriter]] = {
+    "txt": TextWriter,
+    "tree": BoxTreeWriter,
+    "md": MarkdownWriter,
+    "json": JsonWriter,
+    "ndjson": NdjsonWriter,
+}
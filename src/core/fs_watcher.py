@@ -0,0 +1,176 @@
+import os
+import sys
+import errno
+import select
+import struct
+import threading
+from typing import Dict, Optional, Set
+
+# Период опроса директорий без inotify (с)
+POLL_INTERVAL = 1.0
+
+# Флаги inotify (linux/inotify.h)
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """
+    Наблюдение за директориями опросом mtime.
+
+    Изменённые директории накапливаются во множестве, поэтому серия событий
+    в одной директории между двумя вызовами drain() сливается в одно.
+    """
+
+    def __init__(self, interval: float = POLL_INTERVAL):
+        self.interval = interval
+        self._mtimes: Dict[str, int] = {}
+        self._changed: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, path: str) -> None:
+        """Добавление директории под наблюдение"""
+        try:
+            self._mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            pass
+
+    def unwatch(self, path: str) -> None:
+        """Снятие директории с наблюдения"""
+        self._mtimes.pop(path, None)
+
+    def start(self) -> None:
+        """Запуск фонового наблюдения"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Остановка наблюдения"""
+        self._stop.set()
+
+    def drain(self) -> Set[str]:
+        """Изменившиеся с прошлого вызова директории"""
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        return changed
+
+    def _mark(self, path: str) -> None:
+        with self._lock:
+            self._changed.add(path)
+
+    def _poll(self) -> None:
+        for path, mtime in list(self._mtimes.items()):
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                # Удалённую директорию заметит её родитель
+                self._mtimes.pop(path, None)
+                continue
+            if current != mtime:
+                self._mtimes[path] = current
+                self._mark(path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._poll()
+
+
+class InotifyWatcher(PollingWatcher):
+    """
+    Наблюдение через inotify (Linux) с вызовом libc через ctypes.
+    Директории, которые не удалось поставить под наблюдение
+    (например, исчерпан лимит max_user_watches), опрашиваются по mtime.
+    """
+
+    def __init__(self, interval: float = POLL_INTERVAL):
+        super().__init__(interval)
+        # ctypes загружается только при создании наблюдателя, а не при запуске
+        import ctypes
+        import ctypes.util
+        self._get_errno = ctypes.get_errno
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(self._get_errno(), "inotify_init1")
+        self._wds: Dict[int, str] = {}
+        self._paths: Dict[str, int] = {}
+
+    def watch(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            if self._get_errno() != errno.ENOENT:
+                super().watch(path)
+            return
+        self._wds[wd] = path
+        self._paths[path] = wd
+
+    def unwatch(self, path: str) -> None:
+        wd = self._paths.pop(path, None)
+        if wd is not None:
+            self._wds.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+        super().unwatch(path)
+
+    def stop(self) -> None:
+        super().stop()
+        if self._thread is None:
+            os.close(self._fd)
+
+    def _read_events(self) -> None:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # События потеряны - считаем изменёнными все директории
+                with self._lock:
+                    self._changed.update(self._paths)
+                continue
+            path = self._wds.get(wd)
+            if path is None:
+                continue
+            if mask & IN_IGNORED:
+                self._wds.pop(wd, None)
+                self._paths.pop(path, None)
+            elif not mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                self._mark(path)
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([self._fd], [], [], self.interval)
+                if ready:
+                    self._read_events()
+                if self._mtimes:
+                    self._poll()
+        finally:
+            os.close(self._fd)
+
+
+def create_watcher() -> PollingWatcher:
+    """Наблюдатель файловой системы: inotify, если доступен, иначе опрос"""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher()
@@ -0,0 +1,197 @@
+import os
+import re
+from typing import List, Optional, Tuple
+
+# Файлы правил игнорирования, читаемые в каждой директории (в этом порядке:
+# правила из .ignore перекрывают правила из .gitignore)
+IGNORE_FILES = (".gitignore", ".ignore")
+# Признак корня репозитория: правила выше него не читаются
+REPO_MARKER = ".git"
+# Имена, наличие которых в директории важно для построения цепочки правил
+CHAIN_NAMES = IGNORE_FILES + (REPO_MARKER,)
+
+
+def _translate(pattern: str) -> str:
+    """
+    Перевод шаблона .gitignore в регулярное выражение по пути с '/'.
+    '*', '?' и классы символов не пересекают границы каталогов, '**' - пересекает.
+    """
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        ch = pattern[i]
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            # '**/' в начале или между каталогами - ноль и более каталогов
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i) and i + 2 == n and (i == 0 or pattern[i - 1] == "/"):
+            # '/**' в конце - всё содержимое
+            parts.append(".*")
+            i += 2
+        elif ch == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif ch == "?":
+            parts.append("[^/]")
+            i += 1
+        elif ch == "[":
+            j = i + 1
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                parts.append(re.escape(ch))
+                i += 1
+                continue
+            body = pattern[i + 1:j].replace("\\", "\\\\")
+            if body[:1] in ("!", "^"):
+                body = "^" + body[1:]
+            parts.append(f"(?!/)[{body}]")
+            i = j + 1
+        elif ch == "\\" and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(ch))
+            i += 1
+    return "".join(parts)
+
+
+class IgnoreRule:
+    """Одно правило файла игнорирования"""
+
+    __slots__ = ('regex', 'negate', 'dir_only', 'anchored')
+
+    def __init__(self, regex, negate: bool, dir_only: bool, anchored: bool):
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+        # Неякорные правила (без '/' в шаблоне) проверяются по имени элемента
+        self.anchored = anchored
+
+
+def parse_rule(line: str) -> Optional[IgnoreRule]:
+    """Разбор строки .gitignore; None для пустых строк и комментариев"""
+    line = line.rstrip("\n\r")
+    # Хвостовые пробелы отбрасываются, если не экранированы
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+    if not line or line.startswith("#"):
+        return None
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith("\\!") or line.startswith("\\#"):
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    anchored = "/" in line
+    line = line.lstrip("/")
+    return IgnoreRule(re.compile(_translate(line) + r"\Z"), negate, dir_only, anchored)
+
+
+class IgnoreRules:
+    """
+    Скомпилированные правила одного файла .gitignore/.ignore.
+
+    Якорные правила (с '/' в шаблоне) сопоставляются с путём относительно
+    директории файла правил, остальные - с именем элемента на любой глубине.
+    Побеждает последнее совпавшее правило; правило с '!' возвращает элемент.
+    """
+
+    def __init__(self, base: str, rules: List[IgnoreRule]):
+        self.base = base
+        # Правила хранятся в обратном порядке: первое совпадение - последнее в файле
+        self.rules = list(reversed(rules))
+
+    @classmethod
+    def from_file(cls, base: str, file_path: str) -> "IgnoreRules":
+        rules = []
+        try:
+            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    rule = parse_rule(line)
+                    if rule is not None:
+                        rules.append(rule)
+        except OSError:
+            pass
+        return cls(base, rules)
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def match(self, rel_path: str, name: str, is_dir: bool) -> Optional[bool]:
+        """
+        True - элемент игнорируется, False - возвращён правилом с '!',
+        None - ни одно правило не подошло
+        """
+        for rule in self.rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.match(rel_path if rule.anchored else name):
+                return not rule.negate
+        return None
+
+
+# Цепочка правил директории: правила всех предков и её собственные, от корня вглубь
+IgnoreChain = Tuple[IgnoreRules, ...]
+
+
+class IgnoreStack:
+    """
+    Стек правил игнорирования по директориям.
+
+    Для каждой прочитанной директории хранится цепочка правил: цепочка
+    родителя плюс правила её собственных .gitignore/.ignore. Подъём к предкам
+    останавливается на корне репозитория (директории с .git).
+    """
+
+    def __init__(self):
+        self._chains = {}
+
+    def clear(self) -> None:
+        self._chains.clear()
+
+    def chain(self, path: str, names: Optional[set] = None) -> IgnoreChain:
+        """
+        Цепочка правил директории path. names - имена элементов директории,
+        если листинг уже прочитан (тогда наличие файлов правил не проверяется
+        отдельными вызовами stat)
+        """
+        chain = self._chains.get(path)
+        if chain is not None:
+            return chain
+        if names is None:
+            names = {name for name in CHAIN_NAMES
+                     if os.path.lexists(os.path.join(path, name))}
+        parent = os.path.dirname(path)
+        if REPO_MARKER in names or not parent or parent == path:
+            chain = ()
+        else:
+            chain = self.chain(parent)
+        for file_name in IGNORE_FILES:
+            if file_name in names:
+                rules = IgnoreRules.from_file(path, os.path.join(path, file_name))
+                if rules:
+                    chain = chain + (rules,)
+        self._chains[path] = chain
+        return chain
+
+    @staticmethod
+    def is_ignored(chain: IgnoreChain, path: str, name: str, is_dir: bool) -> bool:
+        """Проверка элемента по цепочке правил: глубже лежащие файлы правил важнее"""
+        for rules in reversed(chain):
+            rel_path = path[len(rules.base):].lstrip(os.sep)
+            if os.sep != "/":
+                rel_path = rel_path.replace(os.sep, "/")
+            result = rules.match(rel_path, name, is_dir)
+            if result is not None:
+                return result
+        return False
@@ -0,0 +1,164 @@
+import io
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional
+
+if TYPE_CHECKING:
+    import pstats
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Сколько функций профиля попадает в отчёт
+PROFILE_TOP = 30
+
+
+def peak_memory() -> Optional[int]:
+    """Пиковый объём памяти процесса в байтах (None, если недоступно)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux ru_maxrss - в килобайтах, в macOS - в байтах
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ScanMetrics:
+    """
+    Метрики сканирования и выгрузки.
+
+    Время копится по фазам: listing (чтение директорий), stat (размеры
+    и время изменения при collect_stats), filter (шаблоны и .gitignore),
+    insert (вставка в виджет), export (выгрузка). Фазы, выполняемые
+    в нескольких потоках, суммируются по потокам и могут превышать общее
+    время. Счётчики: dirs, entries, cache_hits.
+
+    При profile = True функции, запущенные через profiled(), выполняются
+    под cProfile, статистика накапливается между запусками.
+    """
+
+    def __init__(self):
+        self.profile = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Начало нового замера"""
+        with self._lock:
+            self.phases: Dict[str, float] = {}
+            self.counters: Dict[str, int] = {}
+            self.started = time.perf_counter()
+            self.finished: Optional[float] = None
+            self.stats: Optional["pstats.Stats"] = None
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Добавление времени к фазе"""
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def count(self, counter: str, n: int = 1) -> None:
+        """Увеличение счётчика"""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + n
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Замер времени блока как фазы name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def profiled(self, func: Callable, *args, **kwargs):
+        """Вызов func под cProfile (если profile включён) с накоплением статистики"""
+        if not self.profile:
+            return func(*args, **kwargs)
+        # cProfile и pstats нужны только при включённом профилировании
+        import pstats
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Профилировщик уже активен в другом потоке (Python 3.12+)
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            with self._lock:
+                if self.stats is None:
+                    self.stats = pstats.Stats(profiler, stream=io.StringIO())
+                else:
+                    self.stats.add(profiler)
+
+    def finish(self) -> None:
+        """Фиксация общего времени замера"""
+        self.finished = time.perf_counter()
+
+    @property
+    def wall(self) -> float:
+        """Общее время замера"""
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    def report(self) -> dict:
+        """Полный отчёт в виде словаря (для JSON)"""
+        wall = self.wall
+        with self._lock:
+            phases = dict(self.phases)
+            counters = dict(self.counters)
+            stats = self.stats
+        dirs = counters.get("dirs", 0)
+        entries = counters.get("entries", 0)
+        report = {
+            "wall": wall,
+            "phases": phases,
+            "counters": counters,
+            "dirs_per_sec": dirs / wall if wall else 0.0,
+            "entries_per_sec": entries / wall if wall else 0.0,
+            "peak_memory": peak_memory(),
+        }
+        if stats is not None:
+            report["profile"] = self._profile_top(stats)
+        return report
+
+    @staticmethod
+    def _profile_top(stats: "pstats.Stats") -> list:
+        """Самые затратные функции профиля по накопленному времени"""
+        rows = []
+        for (file_name, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({
+                "function": f"{file_name}:{line}({func})",
+                "calls": calls,
+                "tottime": tottime,
+                "cumtime": cumtime,
+            })
+        rows.sort(key=lambda row: row["cumtime"], reverse=True)
+        return rows[:PROFILE_TOP]
+
+    def summary(self) -> str:
+        """Краткая сводка для строки состояния"""
+        report = self.report()
+        parts = [
+            f"{report['wall']:.2f} с",
+            f"{report['dirs_per_sec']:.0f} дир/с",
+            f"{report['entries_per_sec']:.0f} эл/с",
+        ]
+        parts.extend(f"{name} {seconds:.2f} с" for name, seconds in report["phases"].items())
+        if report["peak_memory"] is not None:
+            parts.append(f"память {report['peak_memory'] / (1 << 20):.0f} МБ")
+        return ", ".join(parts)
+
+    def save(self, path: str) -> None:
+        """Запись отчёта в JSON; профиль, если он снят, - рядом в формате pstats (.prof)"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        if self.stats is not None:
+            self.stats.dump_stats(os.path.splitext(path)[0] + ".prof")
@@ -0,0 +1,170 @@
+import re
+import fnmatch
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from .tree_model import TreeNode
+
+# Символы, превращающие запрос в glob
+GLOB_CHARS = set('*?[')
+# Разделитель имён в общей строке: в именах файлов он встречаться не может
+SEP = "\0"
+
+
+def _is_glob(query: str) -> bool:
+    return any(ch in GLOB_CHARS for ch in query)
+
+
+def _glob_literals(query: str) -> List[str]:
+    """Участки glob-запроса без спецсимволов (вне классов [...])"""
+    literals = []
+    current = []
+    in_class = False
+    for ch in query:
+        if in_class:
+            in_class = ch != ']'
+        elif ch == '[':
+            in_class = True
+        if in_class or ch in '*?]':
+            if current:
+                literals.append("".join(current))
+                current = []
+        else:
+            current.append(ch)
+    if current:
+        literals.append("".join(current))
+    return literals
+
+
+class NameIndex:
+    """
+    Индекс имён узлов дерева для поиска по подстроке и glob-шаблону.
+
+    Узлы хранятся по имени в нижнем регистре, а все различные имена сцеплены
+    в одну строку через '\\0'. Поиск подстроки - цикл str.find по этой строке
+    (работает на скорости C), совпадение разворачивается до границ имени.
+    Для glob-запроса строка просматривается по самому длинному участку без
+    спецсимволов, кандидаты проверяются регулярным выражением.
+
+    Узлы добавляются во время сканирования почти даром: новые имена
+    дописываются в строку при ближайшем поиске. Если запрос лишь дополняет
+    предыдущий, кандидатами служат результаты предыдущего запроса.
+    """
+
+    def __init__(self):
+        self._nodes: Dict[str, List["TreeNode"]] = {}
+        self._blob = SEP
+        # Имена, уже записанные в строку, и ещё не записанные
+        self._blob_names: Set[str] = set()
+        self._pending: List[str] = []
+        # Последний запрос и все совпавшие имена (None, если поиск был ограничен)
+        self._last: Optional[Tuple[str, List[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def clear(self) -> None:
+        self._nodes.clear()
+        self._blob = SEP
+        self._blob_names.clear()
+        self._pending.clear()
+        self._last = None
+
+    def add(self, nodes: Iterable["TreeNode"]) -> None:
+        """Добавление узлов в индекс"""
+        index = self._nodes
+        for node in nodes:
+            key = node.name.lower()
+            same = index.get(key)
+            if same is None:
+                index[key] = [node]
+                self._pending.append(key)
+            else:
+                same.append(node)
+        self._last = None
+
+    def remove(self, nodes: Iterable["TreeNode"]) -> None:
+        """Удаление узлов из индекса (строка имён чистится при перестроении)"""
+        index = self._nodes
+        for node in nodes:
+            key = node.name.lower()
+            same = index.get(key)
+            if same is None:
+                continue
+            try:
+                same.remove(node)
+            except ValueError:
+                continue
+            if not same:
+                del index[key]
+        self._last = None
+
+    def _flush(self) -> None:
+        """Дописывание новых имён в строку; перестроение, если устаревших много"""
+        if len(self._blob_names) > 2 * len(self._nodes) + 1024:
+            self._blob_names = set(self._nodes)
+            self._blob = SEP + SEP.join(self._blob_names) + SEP
+            self._pending.clear()
+            return
+        new = [key for key in self._pending if key not in self._blob_names]
+        self._pending.clear()
+        if new:
+            self._blob_names.update(new)
+            self._blob += SEP.join(new) + SEP
+
+    def _find(self, literal: str) -> Iterable[str]:
+        """Имена из строки, содержащие literal (пустой literal не ищется)"""
+        if not literal:
+            return
+        blob = self._blob
+        find, rfind = blob.find, blob.rfind
+        pos = find(literal, 1)
+        while pos != -1:
+            start = rfind(SEP, 0, pos) + 1
+            end = find(SEP, pos + len(literal))
+            if end == -1:
+                return
+            yield blob[start:end]
+            pos = find(literal, end + 1)
+
+    def match_names(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """Имена (в нижнем регистре), подходящие под запрос; не больше limit"""
+        if not query.strip():
+            return []
+        query = query.lower()
+        glob = _is_glob(query)
+        last = self._last
+        if last is not None and not glob and not _is_glob(last[0]) and last[0] in query:
+            # Уточнение предыдущего запроса: кандидаты - его результаты
+            candidates: Iterable[str] = last[1]
+        else:
+            self._flush()
+            if glob:
+                literals = _glob_literals(query)
+                candidates = self._find(max(literals, key=len)) if literals else self._nodes
+            else:
+                candidates = self._find(query)
+
+        index = self._nodes
+        if glob:
+            match = re.compile(fnmatch.translate(query)).match
+            test = lambda name: match(name) is not None
+        else:
+            test = lambda name: query in name
+        names = []
+        for name in candidates:
+            if name in index and test(name):
+                names.append(name)
+                if limit is not None and len(names) >= limit:
+                    self._last = None
+                    return names
+        self._last = (query, names)
+        return names
+
+    def search(self, query: str, limit: Optional[int] = None) -> List["TreeNode"]:
+        """
+        Узлы, чьё имя содержит query (без учёта регистра) или, если в запросе
+        есть '*', '?' или '[', целиком подходит под glob-шаблон.
+        limit ограничивает число различных найденных имён.
+        """
+        return [node for name in self.match_names(query, limit) for node in self._nodes[name]]
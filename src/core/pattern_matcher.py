@@ -0,0 +1,148 @@
+import re
+import fnmatch
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+# Символы, превращающие шаблон в glob
+GLOB_CHARS = set('*?[')
+# Сколько скомпилированных наборов шаблонов хранится в кэше
+MATCHER_CACHE_SIZE = 16
+
+
+def _is_glob(pattern: str) -> bool:
+    return any(ch in GLOB_CHARS for ch in pattern)
+
+
+def is_anchored(pattern: str) -> bool:
+    """
+    Шаблон с '/' в начале ('/build') привязан к корню сканирования.
+    Такие шаблоны не поддерживаются: имена проверяются без учёта корня
+    """
+    return pattern.strip().replace('\\', '/').startswith('/')
+
+
+class PatternMatcher:
+    """
+    Скомпилированный набор шаблонов исключений.
+
+    Шаблоны раскладываются по видам один раз при создании:
+    - точные имена ('node_modules') - хэш-множество;
+    - суффиксы и расширения ('*.log', '*~') - множества по длине суффикса;
+    - прочие glob-шаблоны ('*.sublime-*', 'temp?') - одно общее регулярное выражение;
+    - шаблоны с путём ('Properties/PublishProfiles') - регулярное выражение
+      по хвосту пути, проверяется только если совпало последнее имя.
+
+    Шаблоны, привязанные к корню ('/build', см. is_anchored), не применяются
+    и собираются в unsupported: без привязки они совпали бы на любой глубине.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = frozenset(patterns)
+        self.exact: Set[str] = set()
+        self.suffixes: Dict[int, Set[str]] = {}
+        self.path_tails: Set[str] = set()
+        self.unsupported: Set[str] = set()
+
+        globs: List[str] = []
+        path_patterns: List[str] = []
+        path_globs = False
+
+        for pattern in self.patterns:
+            pattern = pattern.strip().replace('\\', '/').rstrip('/')
+            if not pattern:
+                continue
+            if pattern.startswith('/'):
+                self.unsupported.add(pattern)
+                continue
+            if '/' in pattern:
+                path_patterns.append(pattern)
+                tail = pattern.rsplit('/', 1)[1]
+                if _is_glob(tail):
+                    path_globs = True
+                else:
+                    self.path_tails.add(tail)
+            elif not _is_glob(pattern):
+                self.exact.add(pattern)
+            elif pattern.startswith('*') and not _is_glob(pattern[1:]) and len(pattern) > 1:
+                suffix = pattern[1:]
+                self.suffixes.setdefault(len(suffix), set()).add(suffix)
+            else:
+                globs.append(fnmatch.translate(pattern))
+
+        # Суффиксы проверяем от длинных к коротким
+        self._suffix_items = sorted(self.suffixes.items(), reverse=True)
+        self._glob_re = re.compile('|'.join(globs)) if globs else None
+        self._path_re = None
+        if path_patterns:
+            parts = []
+            for pattern in path_patterns:
+                # fnmatch.translate заканчивает выражение на \Z, '*' не должна
+                # пересекать границы каталогов
+                translated = fnmatch.translate(pattern).replace('.*', '[^/]*')
+                parts.append(translated)
+            self._path_re = re.compile(r'(?:^|/)(?:%s)' % '|'.join(parts))
+        # Если у всех шаблонов с путём хвост без glob, выражение по пути
+        # запускается только для элементов с подходящим именем
+        self._path_gated = not path_globs
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def matches(self, name: str, path: Optional[str] = None) -> bool:
+        """Проверка имени (и, при наличии, пути) элемента на совпадение с шаблонами"""
+        if name in self.exact:
+            return True
+        for length, suffixes in self._suffix_items:
+            if len(name) >= length and name[-length:] in suffixes:
+                return True
+        if self._glob_re is not None and self._glob_re.match(name):
+            return True
+        if path is not None and self._path_re is not None:
+            if self._path_gated and name not in self.path_tails:
+                return False
+            return self._path_re.search(path.replace('\\', '/')) is not None
+        return False
+
+
+class MatcherCache:
+    """
+    Кэш скомпилированных наборов шаблонов с вытеснением давно не использованных.
+
+    Ключ - сам набор шаблонов (frozenset), то есть хэш его содержимого:
+    повторное переключение на уже встречавшийся профиль не компилирует
+    шаблоны заново, а изменённый набор получает новую запись.
+    """
+
+    def __init__(self, size: int = MATCHER_CACHE_SIZE):
+        self.size = size
+        self._matchers: "OrderedDict[FrozenSet[str], PatternMatcher]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._matchers)
+
+    def get(self, patterns: Iterable[str]) -> PatternMatcher:
+        """Скомпилированный набор шаблонов (из кэша или новый)"""
+        key = frozenset(patterns)
+        with self._lock:
+            matcher = self._matchers.get(key)
+            if matcher is not None:
+                self._matchers.move_to_end(key)
+                return matcher
+        # Компиляция - вне блокировки, она может быть долгой
+        matcher = PatternMatcher(key)
+        with self._lock:
+            self._matchers[key] = matcher
+            self._matchers.move_to_end(key)
+            while len(self._matchers) > self.size:
+                self._matchers.popitem(last=False)
+        return matcher
+
+    def clear(self) -> None:
+        with self._lock:
+            self._matchers.clear()
+
+
+# Общий кэш для всех сканеров процесса
+MATCHER_CACHE = MatcherCache()
@@ -1,53 +1,203 @@
 import os
 import json
-from typing import Dict, List, Set
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+DEFAULT_PROFILE = "Стандартный"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS patterns (
+    profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    pattern TEXT NOT NULL,
+    PRIMARY KEY (profile_id, pattern)
+) WITHOUT ROWID;
+"""
+
 
 class ProfileManager:
-    def __init__(self, config_dir: str):
+    """
+    Хранилище профилей исключений в SQLite (profiles.db).
+
+    Каждый профиль и каждый шаблон - отдельная строка, поэтому сохранение
+    профиля записывает только добавленные и удалённые шаблоны, а каждое
+    изменение выполняется одной транзакцией: сбой во время записи не портит
+    остальные профили. При загрузке читаются только имена профилей, шаблоны
+    профиля читаются при первом обращении к нему.
+
+    Профили из прежнего profiles.json переносятся в базу при первом запуске
+    приложения, файл после переноса переименовывается в profiles.json.bak.
+    При migrate = False (командная строка) перенос не выполняется: пока базы
+    нет, профили читаются из profiles.json без изменения файлов.
+
+    Ошибки базы при чтении выводятся и не прерывают работу, при записи -
+    передаются вызывающему как Exception с описанием.
+    """
+
+    def __init__(self, config_dir: str, load: bool = True, migrate: bool = True):
         self.config_dir = config_dir
+        self.migrate = migrate
+        self.db_file = os.path.join(config_dir, "profiles.db")
         self.config_file = os.path.join(config_dir, "profiles.json")
-        self.profiles: Dict[str, List[str]] = {}
-        self.current_profile = "Стандартный"
-        self.load_profiles()
+        self.current_profile = DEFAULT_PROFILE
+        self._names: List[str] = []
+        # Шаблоны уже прочитанных профилей
+        self._patterns: Dict[str, Set[str]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        # Соединение используется и из фонового потока загрузки
+        self._lock = threading.RLock()
+        # При load = False профили читаются позже вызовом load_profiles
+        # (например, в фоновом потоке после показа окна)
+        if load:
+            self.load_profiles()
 
-    def load_profiles(self) -> None:
-        """Загрузка профилей из файла конфигурации"""
-        try:
+    def _connect(self) -> sqlite3.Connection:
+        """Соединение с базой; при первом вызове создаётся схема и переносится JSON"""
+        if self._conn is None:
             os.makedirs(self.config_dir, exist_ok=True)
-            if os.path.exists(self.config_file):
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            with conn:
+                conn.executescript(SCHEMA)
+            self._conn = conn
+            if self.migrate:
+                self._migrate_json()
+        return self._conn
+
+    def _migrate_json(self) -> None:
+        """Перенос профилей из profiles.json, если база ещё пуста"""
+        conn = self._conn
+        if conn.execute("SELECT 1 FROM profiles LIMIT 1").fetchone() is not None:
+            return
+        profiles: Dict[str, List[str]] = {}
+        if os.path.exists(self.config_file):
+            try:
                 with open(self.config_file, 'r', encoding='utf-8') as f:
-                    self.profiles = json.load(f)
-        except Exception:
-            self.profiles = {"Стандартный": []}
-            self.save_profiles()
-
-    def save_profiles(self) -> None:
-        """Сохранение профилей в файл конфигурации"""
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.profiles, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            raise Exception(f"Не удалось сохранить профили: {str(e)}")
+                    profiles = json.load(f)
+            except (OSError, ValueError):
+                # Повреждённый файл остаётся на месте, перенос повторится при следующем запуске
+                return
+        with conn:
+            self._insert_profile(DEFAULT_PROFILE)
+            for name, patterns in profiles.items():
+                profile_id = self._insert_profile(name)
+                self._insert_patterns(profile_id, patterns)
+        if profiles:
+            os.replace(self.config_file, self.config_file + ".bak")
+
+    def _insert_profile(self, name: str) -> int:
+        self._conn.execute("INSERT OR IGNORE INTO profiles(name) VALUES (?)", (name,))
+        return self._profile_id(name)
+
+    def _profile_id(self, name: str) -> Optional[int]:
+        row = self._conn.execute("SELECT id FROM profiles WHERE name = ?", (name,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _insert_patterns(self, profile_id: int, patterns: Iterable[str]) -> None:
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO patterns(profile_id, pattern) VALUES (?, ?)",
+            ((profile_id, pattern) for pattern in patterns)
+        )
+
+    def load_profiles(self) -> None:
+        """Загрузка списка профилей (шаблоны читаются при обращении к профилю)"""
+        with self._lock:
+            if not self.migrate and not os.path.exists(self.db_file):
+                self._load_json()
+                return
+            try:
+                conn = self._connect()
+                self._names = [name for name, in
+                               conn.execute("SELECT name FROM profiles ORDER BY id")]
+                if DEFAULT_PROFILE not in self._names:
+                    self._names.insert(0, DEFAULT_PROFILE)
+            except (OSError, sqlite3.Error) as e:
+                # База недоступна или повреждена: работаем со стандартным профилем,
+                # файл не перезаписывается
+                print(f"Ошибка при чтении профилей: {str(e)}")
+                self._names = [DEFAULT_PROFILE]
+            self._patterns.clear()
+
+    def _load_json(self) -> None:
+        """Чтение профилей из profiles.json без переноса в базу"""
+        profiles: Dict[str, List[str]] = {}
+        if os.path.exists(self.config_file):
+            try:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    profiles = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ошибка при чтении профилей: {str(e)}")
+        self._names = [DEFAULT_PROFILE] + [name for name in profiles if name != DEFAULT_PROFILE]
+        self._patterns = {name: set(patterns) for name, patterns in profiles.items()}
+
+    def _read_patterns(self, name: str) -> Set[str]:
+        """Шаблоны профиля (из памяти или из базы); ошибки базы не перехватываются"""
+        patterns = self._patterns.get(name)
+        if patterns is None:
+            patterns = set()
+            if name in self._names:
+                patterns = {pattern for pattern, in self._connect().execute(
+                    "SELECT pattern FROM patterns JOIN profiles ON profiles.id = profile_id "
+                    "WHERE name = ?", (name,))}
+            self._patterns[name] = patterns
+        return patterns
 
     def get_profile(self, name: str) -> Set[str]:
         """Получение профиля по имени"""
-        return set(self.profiles.get(name, []))
+        with self._lock:
+            try:
+                return set(self._read_patterns(name))
+            except (OSError, sqlite3.Error) as e:
+                # Профиль не запоминается пустым: при следующем обращении чтение повторится
+                print(f"Ошибка при чтении профиля {name}: {str(e)}")
+                return set()
 
     def save_profile(self, name: str, patterns: Set[str]) -> None:
-        """Сохранение профиля"""
-        if name == "Стандартный":
+        """Сохранение профиля: записываются только изменившиеся шаблоны"""
+        if name == DEFAULT_PROFILE:
             raise ValueError("Нельзя изменить стандартный профиль")
-        self.profiles[name] = list(patterns)
-        self.save_profiles()
+        with self._lock:
+            patterns = set(patterns)
+            try:
+                old = set(self._read_patterns(name))
+                conn = self._connect()
+                with conn:
+                    profile_id = self._insert_profile(name)
+                    conn.executemany(
+                        "DELETE FROM patterns WHERE profile_id = ? AND pattern = ?",
+                        ((profile_id, pattern) for pattern in old - patterns)
+                    )
+                    self._insert_patterns(profile_id, patterns - old)
+            except (OSError, sqlite3.Error) as e:
+                raise Exception(f"Не удалось сохранить профили: {str(e)}")
+            self._patterns[name] = patterns
+            if name not in self._names:
+                self._names.append(name)
 
     def delete_profile(self, name: str) -> None:
         """Удаление профиля"""
-        if name == "Стандартный":
+        if name == DEFAULT_PROFILE:
             raise ValueError("Нельзя удалить стандартный профиль")
-        if name in self.profiles:
-            del self.profiles[name]
-            self.save_profiles()
+        with self._lock:
+            if name not in self._names:
+                return
+            try:
+                conn = self._connect()
+                with conn:
+                    conn.execute("DELETE FROM profiles WHERE name = ?", (name,))
+            except (OSError, sqlite3.Error) as e:
+                raise Exception(f"Не удалось сохранить профили: {str(e)}")
+            self._names.remove(name)
+            self._patterns.pop(name, None)
 
     def get_profile_names(self) -> List[str]:
         """Получение списка имен профилей"""
-        return list(self.profiles.keys()) 
\ No newline at end of file
+        return list(self._names)
+
+    def has_profile(self, name: str) -> bool:
+        return name in self._names
@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Optional, Set
+
+from .directory_scanner import ScanEntry
+
+# Версия формата файла кэша
+CACHE_VERSION = 3
+# Флаги записи в файле кэша
+FLAG_DIR = 1
+FLAG_LINK = 2
+# Листинги директорий, изменённых менее чем столько секунд назад, не кэшируются:
+# изменение в пределах той же метки времени было бы не видно
+RACY_WINDOW = 2.0
+# Листинги, не использованные столько дней, удаляются при сохранении
+CACHE_TTL_DAYS = 30
+# Наибольшее число директорий в кэше (лишние - давно не использованные)
+MAX_CACHED_DIRS = 200000
+
+
+def _today() -> int:
+    """Номер текущего дня - отметка последнего использования листинга"""
+    return int(time.time() // 86400)
+
+
+class ScanCache:
+    """
+    Кэш листингов директорий для инкрементального пересканирования.
+
+    Для каждой директории хранится полный (без фильтрации) отсортированный
+    листинг вместе с mtime и inode директории. Листинг перечитывается с диска,
+    только если mtime или inode изменились; при смене профиля листинги,
+    уже проверенные в этой сессии, можно использовать без проверки, лишь
+    заново применив шаблоны исключений. Листинги из прошлых сессий проверяются
+    всегда.
+
+    Кроме того, для листинга хранится день последнего использования: давно не
+    использованные листинги при сохранении удаляются, а число директорий
+    ограничено MAX_CACHED_DIRS.
+    """
+
+    def __init__(self, config_dir: str):
+        self.cache_file = os.path.join(config_dir, "scan_cache.json")
+        # Путь -> [mtime_ns, inode, записи, день последнего использования]
+        self._dirs: Dict[str, list] = {}
+        # Директории, листинги которых проверены или прочитаны в этой сессии
+        self._validated: Set[str] = set()
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    self._dirs.update(data.get("dirs", {}))
+            except Exception:
+                pass
+            self._loaded = True
+
+    def get(self, path: str, validate: bool = True) -> Optional[List[ScanEntry]]:
+        """
+        Листинг директории из кэша или None, если его нет или он устарел.
+        validate = False пропускает проверку только для директорий, уже
+        проверенных в этой сессии
+        """
+        self._ensure_loaded()
+        record = self._dirs.get(path)
+        if record is None:
+            return None
+        mtime_ns, ino, entries, used = record
+        if validate or path not in self._validated:
+            try:
+                st = os.stat(path)
+            except OSError:
+                self._dirs.pop(path, None)
+                self._dirty = True
+                return None
+            if st.st_mtime_ns != mtime_ns or st.st_ino != ino:
+                return None
+            self._validated.add(path)
+        today = _today()
+        if used != today:
+            record[3] = today
+            self._dirty = True
+        if entries and not isinstance(entries[0], ScanEntry):
+            # Записи, прочитанные из файла, разворачиваются при первом обращении
+            entries = [ScanEntry(name, os.path.join(path, name), bool(flags & FLAG_DIR),
+                                 is_link=bool(flags & FLAG_LINK))
+                       for name, flags in entries]
+            record[2] = entries
+        return entries
+
+    def put(self, path: str, st: os.stat_result, entries: List[ScanEntry]) -> None:
+        """Сохранение листинга директории в кэше"""
+        if time.time() - st.st_mtime < RACY_WINDOW:
+            return
+        self._ensure_loaded()
+        self._dirs[path] = [st.st_mtime_ns, st.st_ino, entries, _today()]
+        self._validated.add(path)
+        self._dirty = True
+
+    def clear(self) -> None:
+        """Очистка кэша"""
+        self._ensure_loaded()
+        self._dirs.clear()
+        self._validated.clear()
+        self._dirty = True
+
+    def _prune(self) -> None:
+        """Удаление давно не использованных листингов и ограничение размера кэша"""
+        oldest = _today() - CACHE_TTL_DAYS
+        stale = [path for path, record in self._dirs.copy().items() if record[3] < oldest]
+        if len(self._dirs) - len(stale) > MAX_CACHED_DIRS:
+            by_use = sorted(self._dirs.copy().items(), key=lambda item: item[1][3])
+            stale = [path for path, _ in by_use[:len(by_use) - MAX_CACHED_DIRS]]
+        for path in stale:
+            self._dirs.pop(path, None)
+            self._validated.discard(path)
+
+    def save(self) -> None:
+        """Атомарная запись кэша на диск"""
+        if not self._dirty:
+            return
+        self._prune()
+        dirs = {
+            path: [mtime_ns, ino, [
+                [e.name, (FLAG_DIR if e.is_dir else 0) | (FLAG_LINK if e.is_link else 0)]
+                if isinstance(e, ScanEntry) else e
+                for e in entries
+            ], used]
+            for path, (mtime_ns, ino, entries, used) in self._dirs.copy().items()
+        }
+        tmp_file = self.cache_file + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({"version": CACHE_VERSION, "dirs": dirs}, f,
+                          ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except Exception as e:
+            print(f"Не удалось сохранить кэш сканирования: {str(e)}")
+
+
+def nested_roots(paths: List[str]) -> List[str]:
+    """Корни, лежащие внутри другого корня из paths (или повторяющие его)"""
+    normalized = [os.path.normcase(os.path.abspath(path)) for path in paths]
+    nested = []
+    for i, path in enumerate(normalized):
+        for j, other in enumerate(normalized):
+            if i == j:
+                continue
+            inside = path.startswith(other.rstrip(os.sep) + os.sep)
+            if inside or (path == other and j < i):
+                nested.append(paths[i])
+                break
+    return nested
+
+
+class SharedListings:
+    """
+    Листинги директорий, общие для одновременных обходов рабочей области.
+
+    Если один корень вложен в другой, его содержимое читают оба обхода:
+    листинг, прочитанный первым из них, отдаётся второму без обращения
+    к диску. Хранятся только листинги внутри вложенных корней (prefixes).
+    """
+
+    def __init__(self, prefixes: List[str]):
+        self.prefixes = tuple(os.path.normcase(os.path.abspath(p)).rstrip(os.sep)
+                              for p in prefixes)
+        self._listings: Dict[str, List[ScanEntry]] = {}
+        self._lock = threading.Lock()
+
+    def covers(self, path: str) -> bool:
+        path = os.path.normcase(os.path.abspath(path))
+        return any(path == prefix or path.startswith(prefix + os.sep)
+                   for prefix in self.prefixes)
+
+    def get(self, path: str) -> Optional[List[ScanEntry]]:
+        with self._lock:
+            return self._listings.get(path)
+
+    def put(self, path: str, entries: List[ScanEntry]) -> None:
+        with self._lock:
+            self._listings.setdefault(path, entries)
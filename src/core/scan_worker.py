@@ -0,0 +1,150 @@
+import queue
+import threading
+from typing import List, Optional
+
+from .directory_scanner import DirectoryScanner, ScanBudget
+from .scan_cache import SharedListings, nested_roots
+
+
+class ScanWorker:
+    """
+    Фоновое сканирование дерева каталогов.
+
+    Обход выполняется в отдельном потоке, результаты передаются пачками
+    через очередь: каждая пачка - список пар (путь директории, записи).
+    По окончании обхода в очередь кладётся DONE; truncated - был ли обход
+    остановлен ограничениями сканера (ScanLimits).
+    """
+
+    DONE = None
+
+    def __init__(self, scanner: DirectoryScanner, root_path: str, batch_size: int = 500):
+        self.scanner = scanner
+        self.root_path = root_path
+        self.batch_size = batch_size
+        self.queue: "queue.Queue" = queue.Queue()
+        self.dirs_scanned = 0
+        self.entries_scanned = 0
+        self.error: Optional[Exception] = None
+        self.budget = scanner.budget(root_path)
+        self._counts_lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run_profiled, daemon=True)
+
+    def start(self) -> None:
+        """Запуск обхода"""
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Немедленная остановка обхода"""
+        self._cancel.set()
+
+    @property
+    def truncated(self) -> bool:
+        return self.budget.truncated
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run_profiled(self) -> None:
+        """Обход под cProfile, если у сканера включено профилирование"""
+        if self.scanner.metrics is not None:
+            self.scanner.metrics.profiled(self._run)
+        else:
+            self._run()
+
+    def _run(self) -> None:
+        try:
+            self._walk_root(self.root_path, self.budget)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.queue.put(self.DONE)
+        self._save_cache()
+
+    def _save_cache(self) -> None:
+        if self.error is None and not self.cancelled:
+            # Кэш сохраняется уже после сигнала о завершении, чтобы не задерживать UI
+            self.scanner.save_cache()
+
+    def _walk_root(self, root_path: str, budget: ScanBudget) -> None:
+        """Обход одного корня с передачей результатов в очередь пачками"""
+        batch = []
+        batch_entries = 0
+        for dir_path, entries in self.scanner.walk(root_path, self._cancel, budget):
+            batch.append((dir_path, entries))
+            batch_entries += len(entries) + 1
+            if batch_entries >= self.batch_size:
+                self._put(batch)
+                batch = []
+                batch_entries = 0
+        if batch and not self.cancelled:
+            self._put(batch)
+
+    def _put(self, batch: list) -> None:
+        with self._counts_lock:
+            self.dirs_scanned += len(batch)
+            self.entries_scanned += sum(len(entries) for _, entries in batch)
+        self.queue.put(batch)
+
+
+class WorkspaceScanWorker(ScanWorker):
+    """
+    Одновременное сканирование нескольких корней рабочей области.
+
+    Каждый корень обходится в своём потоке тем же сканером (общие
+    скомпилированные шаблоны и кэш листингов), пачки всех корней идут
+    в одну очередь, DONE - после завершения всех обходов. Если одни корни
+    вложены в другие, листинги их содержимого читаются с диска один раз
+    (см. SharedListings).
+    """
+
+    def __init__(self, scanner: DirectoryScanner, root_paths: List[str],
+                 batch_size: int = 500):
+        super().__init__(scanner, root_paths[0], batch_size)
+        self.root_paths = list(root_paths)
+        self.root_path = ", ".join(self.root_paths)
+        self.budgets = [scanner.budget(path) for path in self.root_paths]
+        self.budget = self.budgets[0]
+
+    @property
+    def truncated(self) -> bool:
+        return any(budget.truncated for budget in self.budgets)
+
+    def _run(self) -> None:
+        if self.scanner.profiling:
+            # Профилировщик видит только свой поток: корни обходятся по очереди
+            try:
+                for path, budget in zip(self.root_paths, self.budgets):
+                    self._walk_root(path, budget)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.queue.put(self.DONE)
+            self._save_cache()
+            return
+        nested = nested_roots(self.root_paths)
+        if nested:
+            self.scanner.shared_listings = SharedListings(nested)
+        threads = [threading.Thread(target=self._run_root, args=(path, budget), daemon=True)
+                   for path, budget in zip(self.root_paths, self.budgets)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            if nested:
+                self.scanner.shared_listings = None
+            self.queue.put(self.DONE)
+        self._save_cache()
+
+    def _run_root(self, root_path: str, budget: ScanBudget) -> None:
+        try:
+            self._walk_root(root_path, budget)
+        except Exception as e:
+            self.error = e
@@ -0,0 +1,150 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .directory_scanner import DirectoryScanner, ScanBudget
+from .scan_cache import SharedListings, nested_roots
+from .export_writers import WRITERS, StructureWriter
+from .tree_model import TreeModel, TreeNode
+
+# Размер буфера записи файла структуры
+WRITE_BUFFER_SIZE = 1 << 16
+
+
+class StructureExporter:
+    """
+    Потоковая выгрузка структуры каталогов без участия виджета дерева.
+
+    Источник данных - модель дерева: загруженные директории берутся из неё,
+    а ещё не прочитанные обходятся на диске генератором, не задерживаясь
+    в памяти. Узлы передаются писателю формата (см. export_writers) по мере
+    обхода, поэтому расход памяти не зависит от размера дерева.
+    """
+
+    def __init__(self, scanner: DirectoryScanner, indent: str = "    ",
+                 with_stats: bool = False):
+        self.scanner = scanner
+        self.indent = indent
+        # Добавлять к узлам размеры и итоги (см. export_writers.format_stats)
+        self.with_stats = with_stats
+        # Была ли последняя выгрузка усечена ограничениями сканера
+        self.truncated = False
+
+    def iter_nodes(self, root: TreeNode, budget: Optional[ScanBudget] = None,
+                   budgets: Optional[Dict[str, ScanBudget]] = None
+                   ) -> Iterator[Tuple[int, TreeNode, bool]]:
+        """
+        Обход дерева в глубину с выдачей троек (глубина, узел, последний ли
+        среди потомков родителя). Исключённые узлы пропускаются вместе
+        со всем содержимым. Чтение незагруженных директорий с диска подчиняется
+        ограничениям сканера (budget; по умолчанию - новый для root).
+
+        Рабочая область выдаётся одним обходом: служебный корень на глубине 0,
+        корневые директории - на глубине 1, у каждой свои ограничения.
+        budgets - ограничения по путям корней: имеющиеся используются повторно,
+        недостающие создаются и добавляются в словарь.
+        """
+        if root.excluded:
+            return
+        if budgets is None:
+            budgets = {}
+        if not root.is_workspace:
+            if budget is not None:
+                budgets[root.path] = budget
+            yield from self._iter_tree(root, self._budget(root, budgets), 0, True)
+            return
+        yield 0, root, True
+        roots = [child for child in root.children if not child.excluded]
+        for i, child in enumerate(roots):
+            yield from self._iter_tree(child, self._budget(child, budgets), 1,
+                                       i == len(roots) - 1)
+
+    def _budget(self, root: TreeNode, budgets: Dict[str, ScanBudget]) -> ScanBudget:
+        """Ограничения обхода корневой директории root"""
+        budget = budgets.get(root.path)
+        if budget is None:
+            budget = budgets[root.path] = self.scanner.budget(root.path)
+        return budget
+
+    def _iter_tree(self, root: TreeNode, budget: ScanBudget, base: int,
+                   last: bool) -> Iterator[Tuple[int, TreeNode, bool]]:
+        """Обход поддерева корневой директории root, начиная с глубины base"""
+        # Элементы стека: глубина, узел, последний ли, ссылка ли (None - неизвестно)
+        stack = [(base, root, last, None)]
+        while stack:
+            depth, node, last, is_link = stack.pop()
+            yield depth, node, last
+            if not node.is_dir:
+                continue
+            if node.loaded:
+                children = [(child, None) for child in node.children if not child.excluded]
+            elif depth == base or (budget.can_descend(node.path, depth - base, is_link)
+                                   and not budget.exhausted and budget.enter(node.path)):
+                # Временные узлы для непрочитанной директории в модель не попадают
+                entries = budget.take(self.scanner.scan_entries(node.path))
+                children = [(TreeNode(0, entry.name, node, entry.is_dir, entry.size, entry.mtime),
+                             entry.is_link) for entry in entries]
+            else:
+                continue
+            stack.extend(
+                (depth + 1, child, i == 0, child_is_link)
+                for i, (child, child_is_link) in enumerate(reversed(children))
+            )
+
+    def write(self, root: TreeNode, writer: StructureWriter,
+              budget: Optional[ScanBudget] = None,
+              budgets: Optional[Dict[str, ScanBudget]] = None) -> int:
+        """
+        Передача структуры писателю, возвращает число выгруженных узлов.
+        Если выгрузка усечена ограничениями сканера, устанавливается self.truncated
+        """
+        if budgets is None:
+            budgets = {}
+        count = 0
+        writer.begin()
+        for depth, node, last in self.iter_nodes(root, budget, budgets):
+            writer.write(depth, node, last)
+            count += 1
+        writer.end()
+        self.truncated = any(b.truncated for b in budgets.values())
+        return count
+
+    def export(self, root: TreeNode, save_path: str, fmt: str = "txt",
+               budget: Optional[ScanBudget] = None,
+               budgets: Optional[Dict[str, ScanBudget]] = None) -> int:
+        """Запись структуры в файл в формате fmt (ключ WRITERS), возвращает число узлов"""
+        with open(save_path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+            writer = WRITERS[fmt](f, with_stats=self.with_stats, indent=self.indent)
+            return self.write(root, writer, budget, budgets)
+
+    def export_path(self, root_path: str, save_path: str, fmt: str = "txt") -> int:
+        """
+        Выгрузка структуры директории напрямую с диска. С итогами по директориям
+        дерево сначала целиком загружается в модель: итоги директории известны
+        только после обхода её содержимого.
+        """
+        model = TreeModel()
+        root = model.set_root(root_path)
+        budget = self.scanner.budget(root_path)
+        if self.with_stats:
+            model.populate(root, self.scanner.walk(root_path, budget=budget))
+        return self.export(root, save_path, fmt, budget)
+
+    def export_workspace(self, root_paths: List[str], save_path: str, fmt: str = "txt") -> int:
+        """
+        Выгрузка нескольких директорий одним документом за один потоковый
+        проход (корни - потомки служебного узла рабочей области).
+        Содержимое вложенных корней читается с диска один раз (см. SharedListings)
+        """
+        model = TreeModel()
+        roots = model.set_workspace(root_paths)
+        budgets = {root.path: self.scanner.budget(root.path) for root in roots}
+        nested = nested_roots(root_paths)
+        if nested:
+            self.scanner.shared_listings = SharedListings(nested)
+        try:
+            if self.with_stats:
+                for root in roots:
+                    model.populate(root, self.scanner.walk(root.path, budget=budgets[root.path]))
+            return self.export(model.root, save_path, fmt, budgets=budgets)
+        finally:
+            if nested:
+                self.scanner.shared_listings = None
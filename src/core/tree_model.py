@@ -0,0 +1,269 @@
+import os
+import sys
+import itertools
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .directory_scanner import ScanEntry
+from .name_index import NameIndex
+
+# Имя корня рабочей области из нескольких директорий
+WORKSPACE_TITLE = "Рабочая область"
+
+
+class TreeNode:
+    """
+    Узел дерева каталогов.
+
+    Полный путь не хранится, а собирается по цепочке родителей; у корня
+    в name лежит полный путь корневой директории. Имена интернируются,
+    у файлов нет списка потомков.
+
+    size у файла - его размер, у директории - суммарный размер загруженного
+    содержимого; files и dirs - число файлов и директорий в поддереве.
+
+    В рабочей области корень - служебный узел с пустым именем, а его потомки -
+    корневые директории, в name которых лежат их полные пути.
+    """
+
+    __slots__ = ('id', 'name', 'parent', 'children', 'is_dir', 'loaded', 'excluded',
+                 'size', 'mtime', 'files', 'dirs')
+
+    def __init__(self, id: int, name: str, parent: Optional['TreeNode'], is_dir: bool,
+                 size: int = 0, mtime: float = 0.0):
+        self.id = id
+        self.name = sys.intern(name)
+        self.parent = parent
+        self.is_dir = is_dir
+        self.children: Optional[List['TreeNode']] = [] if is_dir else None
+        # Для директорий - прочитано ли содержимое с диска
+        self.loaded = not is_dir
+        self.excluded = False
+        self.size = size
+        self.mtime = mtime
+        self.files = 0
+        self.dirs = 0
+
+    @property
+    def path(self) -> str:
+        """Полный путь элемента"""
+        parts = []
+        node = self
+        while node.parent is not None:
+            parts.append(node.name)
+            node = node.parent
+        if not parts:
+            return node.name
+        return os.path.join(node.name, *reversed(parts))
+
+    @property
+    def is_workspace(self) -> bool:
+        """Служебный корень рабочей области"""
+        return self.parent is None and not self.name
+
+    @property
+    def display_name(self) -> str:
+        """Имя для отображения и выгрузки"""
+        if self.parent is None:
+            if not self.name:
+                return WORKSPACE_TITLE
+            return os.path.basename(os.path.normpath(self.name)) or self.name
+        if self.parent.is_workspace:
+            return os.path.basename(os.path.normpath(self.name)) or self.name
+        return self.name
+
+    def __repr__(self) -> str:
+        return f"TreeNode({self.path!r})"
+
+
+class TreeModel:
+    """
+    Модель дерева каталогов - единый источник данных для интерфейса,
+    выгрузки и командной строки. Хранит флаги исключения и их счётчик,
+    а также индекс имён загруженных узлов для поиска.
+    """
+
+    def __init__(self):
+        self.root: Optional[TreeNode] = None
+        self.excluded_count = 0
+        self.index = NameIndex()
+        self._ids = itertools.count(1)
+
+    def clear(self) -> None:
+        """Очистка модели"""
+        self.root = None
+        self.excluded_count = 0
+        self.index.clear()
+
+    def set_root(self, path: str) -> TreeNode:
+        """Создание корня дерева"""
+        self.clear()
+        self.root = TreeNode(next(self._ids), path, None, True)
+        return self.root
+
+    def set_workspace(self, paths: Iterable[str]) -> List[TreeNode]:
+        """
+        Создание рабочей области: служебный корень и по узлу на каждую
+        корневую директорию. Возвращает узлы корневых директорий
+        """
+        self.clear()
+        self.root = TreeNode(next(self._ids), "", None, True)
+        self.root.loaded = True
+        roots = [TreeNode(next(self._ids), path, self.root, True) for path in paths]
+        self.root.children.extend(roots)
+        self.root.dirs = len(roots)
+        return roots
+
+    def make_node(self, parent: TreeNode, entry: ScanEntry) -> TreeNode:
+        """Создание узла по записи сканера (без добавления в дерево)"""
+        return TreeNode(next(self._ids), entry.name, parent, entry.is_dir,
+                        entry.size, entry.mtime)
+
+    def add_children(self, parent: TreeNode, entries: Iterable[ScanEntry]) -> List[TreeNode]:
+        """
+        Заполнение директории прочитанными записями. Потомки исключённой
+        директории сразу получают флаг исключения.
+        """
+        children = [self.make_node(parent, entry) for entry in entries]
+        if parent.excluded:
+            for node in children:
+                node.excluded = True
+            self.excluded_count += len(children)
+        parent.children.extend(children)
+        parent.loaded = True
+        self.index.add(children)
+        dirs = sum(1 for node in children if node.is_dir)
+        size = sum(node.size for node in children if not node.is_dir)
+        self._add_totals(parent, size, len(children) - dirs, dirs)
+        return children
+
+    def insert_child(self, parent: TreeNode, entry: ScanEntry, index: int) -> TreeNode:
+        """Вставка одного элемента в директорию на заданную позицию"""
+        node = self.make_node(parent, entry)
+        if parent.excluded:
+            node.excluded = True
+            self.excluded_count += 1
+        parent.children.insert(index, node)
+        self.index.add((node,))
+        if node.is_dir:
+            self._add_totals(parent, 0, 0, 1)
+        else:
+            self._add_totals(parent, node.size, 1, 0)
+        return node
+
+    @staticmethod
+    def _add_totals(node: Optional[TreeNode], size: int, files: int, dirs: int) -> None:
+        """Изменение итогов директории и всех её предков"""
+        while node is not None:
+            node.size += size
+            node.files += files
+            node.dirs += dirs
+            node = node.parent
+
+    def populate(self, root: TreeNode, walk: Iterable[Tuple[str, List[ScanEntry]]]) -> None:
+        """Заполнение поддерева результатами DirectoryScanner.walk"""
+        pending = {root.path: root}
+        for dir_path, entries in walk:
+            parent = pending.pop(dir_path, None)
+            if parent is None:
+                continue
+            for entry, node in zip(entries, self.add_children(parent, entries)):
+                if entry.is_dir:
+                    pending[entry.path] = node
+
+    def remove(self, node: TreeNode) -> None:
+        """Удаление узла вместе с поддеревом"""
+        self.excluded_count -= sum(1 for n in self.iter_subtree(node) if n.excluded)
+        if node.parent is None:
+            self.root = None
+            self.index.clear()
+        else:
+            self.index.remove(self.iter_subtree(node))
+            if node.is_dir:
+                self._add_totals(node.parent, -node.size, -node.files, -node.dirs - 1)
+            else:
+                self._add_totals(node.parent, -node.size, -1, 0)
+            node.parent.children.remove(node)
+            node.parent = None
+
+    def set_excluded(self, nodes: Iterable[TreeNode], excluded: bool) -> List[TreeNode]:
+        """
+        Установка флага исключения для узлов вместе с их поддеревьями.
+        Узлы, чей предок тоже передан, повторно не обходятся.
+        Возвращает список узлов, у которых флаг действительно изменился.
+        """
+        nodes = list(nodes)
+        selected = {node.id for node in nodes}
+        changed = []
+        for top in nodes:
+            parent = top.parent
+            while parent is not None and parent.id not in selected:
+                parent = parent.parent
+            if parent is not None:
+                continue
+            for node in self.iter_subtree(top):
+                if node.excluded != excluded:
+                    node.excluded = excluded
+                    changed.append(node)
+        self.excluded_count += len(changed) if excluded else -len(changed)
+        return changed
+
+    def clear_exclusions(self) -> int:
+        """Снятие всех исключений, возвращает число включённых обратно узлов"""
+        count = 0
+        for node in self.iter_nodes():
+            if node.excluded:
+                node.excluded = False
+                count += 1
+        self.excluded_count = 0
+        return count
+
+    def find(self, path: str) -> Optional[TreeNode]:
+        """Поиск загруженного узла по полному пути"""
+        if self.root is None:
+            return None
+        if self.root.is_workspace:
+            for root in self.root.children:
+                node = self._find_in(root, path)
+                if node is not None:
+                    return node
+            return None
+        return self._find_in(self.root, path)
+
+    @staticmethod
+    def _find_in(root: TreeNode, path: str) -> Optional[TreeNode]:
+        """Поиск узла по полному пути в поддереве корневой директории root"""
+        if not path.startswith(root.name):
+            return None
+        rest = path[len(root.name):]
+        if os.altsep:
+            rest = rest.replace(os.altsep, os.sep)
+        if rest and not rest.startswith(os.sep) and not root.name.endswith(('/', os.sep)):
+            return None
+        node = root
+        for part in rest.split(os.sep):
+            if not part:
+                continue
+            if not node.children:
+                return None
+            for child in node.children:
+                if child.name == part:
+                    node = child
+                    break
+            else:
+                return None
+        return node
+
+    @staticmethod
+    def iter_subtree(node: TreeNode) -> Iterator[TreeNode]:
+        """Обход загруженного поддерева в глубину, начиная с node"""
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            yield current
+            if current.children:
+                stack.extend(reversed(current.children))
+
+    def iter_nodes(self) -> Iterator[TreeNode]:
+        """Обход всего загруженного дерева"""
+        if self.root is not None:
+            yield from self.iter_subtree(self.root)
@@ -1,14 +1,46 @@
 import os
+import queue
+import time
+import itertools
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from datetime import datetime
-from typing import Optional, Callable
+from typing import TYPE_CHECKING, List, Optional, Callable
 
-from ..core.directory_scanner import DirectoryScanner
+from ..core.directory_scanner import DirectoryScanner, ScanLimits
 from ..core.profile_manager import ProfileManager
+from ..core.pattern_matcher import is_anchored
+from ..core.scan_cache import ScanCache
+from ..core.scan_worker import ScanWorker, WorkspaceScanWorker
+from ..core.structure_exporter import StructureExporter
+from ..core.export_writers import WRITERS, format_size
+from ..core.fs_watcher import PollingWatcher, create_watcher
+from ..core.metrics import ScanMetrics
+from ..core.tree_model import TreeModel, TreeNode
 from .tree_view import TreeView
+from .virtual_tree_view import VirtualTreeView
 from ..config.default_excludes import DEFAULT_EXCLUDES
 
+if TYPE_CHECKING:
+    # Поиск дубликатов (hashlib, mmap, пул потоков) загружается при первом использовании
+    from ..core.duplicate_finder import DuplicateFinder, DuplicateGroup
+
+# Число потоков чтения директорий в режиме параллельного чтения. По умолчанию
+# обход последовательный: на локальном диске он быстрее (см. benchmarks),
+# параллельное чтение выигрывает на сетевых дисках
+SCAN_WORKERS = 4
+# Период опроса очереди фонового сканирования (мс)
+SCAN_POLL_INTERVAL = 50
+# Сколько времени за один опрос можно тратить на вставку в дерево (с)
+SCAN_POLL_BUDGET = 0.05
+# Период применения накопленных изменений файловой системы (мс)
+WATCH_POLL_INTERVAL = 500
+# Задержка поиска после ввода в поле фильтра (мс)
+FILTER_DELAY = 150
+# Сколько различных имён показывается по запросу фильтра
+FILTER_LIMIT = 5000
+
 class MainWindow:
     def __init__(self, root: tk.Tk):
         self.root = root
@@ -16,14 +48,63 @@ class MainWindow:
         
         # Инициализация компонентов
         self.current_directory: Optional[str] = None
-        self.profile_manager = ProfileManager(
-            os.path.join(os.path.expanduser("~"), ".dir_tree_app")
+        # Директории рабочей области; при нескольких current_directory - первая из них
+        self.workspace_roots: List[str] = []
+        config_dir = os.path.join(os.path.expanduser("~"), ".dir_tree_app")
+        self.config_dir = config_dir
+        # Профили читаются в фоне после показа окна (см. _load_profiles)
+        self.profile_manager = ProfileManager(config_dir, load=False)
+        self.directory_scanner = DirectoryScanner(
+            set(DEFAULT_EXCLUDES),
+            cache=ScanCache(config_dir)
         )
-        self.directory_scanner = DirectoryScanner(set(DEFAULT_EXCLUDES))
+        self.structure_exporter = StructureExporter(self.directory_scanner)
+        self._duplicate_finder: Optional["DuplicateFinder"] = None
+        self.scan_metrics = ScanMetrics()
+        self.directory_scanner.metrics = self.scan_metrics
+        self.tree_model = TreeModel()
+        self._scan_worker: Optional[ScanWorker] = None
+        self._scan_nodes: dict = {}
+        self._watcher: Optional[PollingWatcher] = None
+        self._duplicates_thread: Optional[threading.Thread] = None
+        self._filter_job: Optional[str] = None
         
         self._init_ui()
         self._bind_events()
+        self._load_profiles()
+        
+    @property
+    def duplicate_finder(self) -> "DuplicateFinder":
+        """Поиск дубликатов, создаётся при первом обращении"""
+        if self._duplicate_finder is None:
+            from ..core.duplicate_finder import DuplicateFinder, HashCache
+            self._duplicate_finder = DuplicateFinder(SCAN_WORKERS, HashCache(self.config_dir))
+        return self._duplicate_finder
+        
+    def _load_profiles(self) -> None:
+        """
+        Чтение профилей в фоновом потоке: окно показывается сразу,
+        а элементы управления профилями включаются после загрузки
+        """
+        self._set_profile_controls_state(tk.DISABLED)
+        thread = threading.Thread(target=self.profile_manager.load_profiles, daemon=True)
+        thread.start()
+        self._poll_profiles(thread)
+        
+    def _poll_profiles(self, thread: threading.Thread) -> None:
+        """Ожидание окончания загрузки профилей"""
+        if thread.is_alive():
+            self.root.after(SCAN_POLL_INTERVAL, self._poll_profiles, thread)
+            return
+        self.profile_combo['values'] = self.profile_manager.get_profile_names()
+        self._set_profile_controls_state(tk.NORMAL)
         
+    def _set_profile_controls_state(self, state: str) -> None:
+        """Включение и отключение элементов управления профилями"""
+        self.profile_combo.config(state="readonly" if state == tk.NORMAL else tk.DISABLED)
+        for button in self.profile_buttons:
+            button.config(state=state)
+            
     def _init_ui(self) -> None:
         """Инициализация пользовательского интерфейса"""
         # Главный контейнер
@@ -43,10 +124,13 @@ class MainWindow:
         # Фрейм с кнопками управления
         self._init_control_buttons(main_container)
         
+        # Поле фильтра дерева
+        self._init_filter_frame(main_container)
+        
         # Дерево директорий
-        tree_container = ttk.Frame(main_container)
-        tree_container.pack(fill=tk.BOTH, expand=True)
-        self.tree_view = TreeView(tree_container)
+        self.tree_container = ttk.Frame(main_container)
+        self.tree_container.pack(fill=tk.BOTH, expand=True)
+        self.tree_view = TreeView(self.tree_container, self.tree_model)
         
         # Строка состояния
         self._init_status_bar(main_container)
@@ -67,12 +151,17 @@ class MainWindow:
         self.profile_combo.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
         
         # Кнопки управления профилями
-        ttk.Button(profile_frame, text="Сохранить", 
-                  command=self._save_current_profile).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(profile_frame, text="Сохранить как...", 
-                  command=self._save_profile_as).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(profile_frame, text="Удалить", 
-                  command=self._delete_profile).pack(side=tk.LEFT)
+        self.profile_buttons = [
+            ttk.Button(profile_frame, text="Сохранить", 
+                      command=self._save_current_profile),
+            ttk.Button(profile_frame, text="Сохранить как...", 
+                      command=self._save_profile_as),
+            ttk.Button(profile_frame, text="Удалить", 
+                      command=self._delete_profile),
+        ]
+        for button in self.profile_buttons[:-1]:
+            button.pack(side=tk.LEFT, padx=(0, 5))
+        self.profile_buttons[-1].pack(side=tk.LEFT)
                   
     def _init_directory_frame(self, parent: ttk.Frame) -> None:
         """Инициализация фрейма с текущей директорией"""
@@ -93,12 +182,55 @@ class MainWindow:
         
         ttk.Button(button_frame, text="Выбрать директорию", 
                   command=self._select_directory).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(button_frame, text="Сохранить в TXT", 
+        ttk.Button(button_frame, text="Рабочая область", 
+                  command=self._show_workspace_dialog).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="Сохранить", 
                   command=self._save_structure).pack(side=tk.LEFT, padx=(0, 5))
+        self.export_format = tk.StringVar(value="txt")
+        ttk.Combobox(button_frame, textvariable=self.export_format, 
+                     values=list(WRITERS), state="readonly", 
+                     width=7).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(button_frame, text="Очистить исключения", 
                   command=self._clear_exclusions).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(button_frame, text="Управление шаблонами", 
-                  command=self._show_patterns_dialog).pack(side=tk.LEFT)
+                  command=self._show_patterns_dialog).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="Дубликаты", 
+                  command=self._find_duplicates).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="Ограничения", 
+                  command=self._show_limits_dialog).pack(side=tk.LEFT, padx=(0, 5))
+        self.cancel_button = ttk.Button(button_frame, text="Отмена", 
+                                        command=self._cancel_scan, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.lazy_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(button_frame, text="Загружать при раскрытии", 
+                        variable=self.lazy_mode, 
+                        command=self._on_lazy_mode_changed).pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.watch_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(button_frame, text="Следить за изменениями", 
+                        variable=self.watch_mode, 
+                        command=self._on_watch_mode_changed).pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.stats_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(button_frame, text="Размеры", 
+                        variable=self.stats_mode, 
+                        command=self._on_stats_mode_changed).pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.gitignore_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(button_frame, text="Учитывать .gitignore", 
+                        variable=self.gitignore_mode, 
+                        command=self._on_gitignore_mode_changed).pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.virtual_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(button_frame, text="Виртуальный список", 
+                        variable=self.virtual_mode, 
+                        command=self._on_virtual_mode_changed).pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.parallel_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(button_frame, text="Параллельное чтение", 
+                        variable=self.parallel_mode, 
+                        command=self._on_parallel_mode_changed).pack(side=tk.LEFT)
                   
         # Правая часть с информацией об исключениях
         info_frame = ttk.Frame(controls_frame)
@@ -112,27 +244,57 @@ class MainWindow:
         )
         excluded_count_label.pack(side=tk.RIGHT)
         
+    def _init_filter_frame(self, parent: ttk.Frame) -> None:
+        """Инициализация поля фильтра по именам"""
+        filter_frame = ttk.Frame(parent)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        ttk.Label(filter_frame, text="Фильтр:").pack(side=tk.LEFT, padx=(0, 5))
+        self.filter_text = tk.StringVar()
+        filter_entry = ttk.Entry(filter_frame, textvariable=self.filter_text)
+        filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+        filter_entry.bind("<Escape>", lambda e: self.filter_text.set(""))
+        ttk.Label(filter_frame, text="подстрока или шаблон (*.py)", 
+                  font=("", 9, "italic")).pack(side=tk.LEFT)
+        self.filter_text.trace_add("write", lambda *args: self._schedule_filter())
+        
     def _init_status_bar(self, parent: ttk.Frame) -> None:
         """Инициализация строки состояния"""
+        status_frame = ttk.Frame(parent)
+        status_frame.pack(fill=tk.X, pady=(5, 0))
+        
+        # Замеры производительности: отчёт и снятие профиля cProfile
+        ttk.Button(status_frame, text="Отчёт о замерах", 
+                   command=self._save_metrics_report).pack(side=tk.RIGHT, padx=(5, 0))
+        self.profile_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(status_frame, text="cProfile", 
+                        variable=self.profile_mode, 
+                        command=self._on_profile_mode_changed).pack(side=tk.RIGHT, padx=(5, 0))
+        
         self.status_var = tk.StringVar()
         self.status_bar = ttk.Label(
-            parent,
+            status_frame,
             textvariable=self.status_var,
             relief=tk.SUNKEN,
             padding=(5, 2)
         )
-        self.status_bar.pack(fill=tk.X, pady=(5, 0))
+        self.status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
         self.update_status("Готов к работе")
         
     def _bind_events(self) -> None:
         """Привязка обработчиков событий"""
         self.profile_combo.bind('<<ComboboxSelected>>', self._on_profile_changed)
+        self._bind_tree_view_events()
+        
+    def _bind_tree_view_events(self) -> None:
+        """Привязка обработчиков к виду дерева (и после смены вида)"""
         self.tree_view.bind_events(
             on_exclude=self._exclude_selected,
             on_include=self._include_selected,
             on_add_pattern=self._add_to_patterns,
             on_double_click=self._on_double_click
         )
+        self.tree_view.set_loader(self._load_children)
         
     def update_status(self, message: str) -> None:
         """Обновление строки состояния"""
@@ -141,49 +303,341 @@ class MainWindow:
         
     def _update_excluded_count(self) -> None:
         """Обновление счетчика исключенных элементов"""
-        count = len(self.tree_view.excluded_items)
+        count = self.tree_model.excluded_count
         self.excluded_count_var.set(f"Исключено: {count}")
         
     def _select_directory(self) -> None:
         """Выбор директории для сканирования"""
         directory = filedialog.askdirectory(title="Выберите директорию для сканирования")
         if directory:
-            self.current_directory = directory
-            self.directory_label.config(text=directory)
+            self._set_workspace([directory])
             self._scan_directory()
             
-    def _scan_directory(self) -> None:
-        """Сканирование выбранной директории"""
+    def _set_workspace(self, roots: List[str]) -> None:
+        """Замена набора сканируемых директорий"""
+        self.workspace_roots = list(roots)
+        self.current_directory = self.workspace_roots[0] if self.workspace_roots else None
+        self.directory_label.config(text="; ".join(self.workspace_roots) or "Не выбрана")
+        
+    @property
+    def is_workspace(self) -> bool:
+        """Открыта ли рабочая область из нескольких директорий"""
+        return len(self.workspace_roots) > 1
+            
+    def _scan_directory(self, revalidate: bool = True) -> None:
+        """
+        Сканирование выбранной директории в фоновом потоке.
+        При revalidate = False листинги, уже проверенные в этой сессии, берутся
+        из кэша без обращения к диску; после сканирования проверка включается снова.
+        """
         if not self.current_directory:
             return
             
+        self.directory_scanner.revalidate_cache = revalidate
+        self.scan_metrics.reset()
+        if revalidate:
+            # Файлы .gitignore могли измениться с прошлого сканирования
+            self.directory_scanner.ignore_stack.clear()
+        self._stop_scan_worker()
+        self._stop_watching()
         self.tree_view.clear()
-        root_node = self.tree_view.add_root(
-            os.path.basename(self.current_directory),
-            [self.current_directory]
+        self.tree_view.lazy = self.lazy_mode.get()
+        if self.is_workspace:
+            root_nodes = self.tree_view.add_workspace(self.workspace_roots)
+        else:
+            root_nodes = [self.tree_view.add_root(self.current_directory)]
+        if self.tree_view.lazy:
+            for root_node in root_nodes:
+                self._load_children(root_node)
+            self.directory_scanner.revalidate_cache = True
+            self.update_status(f"Загружена структура директории: {'; '.join(self.workspace_roots)}")
+            self._start_watching()
+            return
+            
+        # Вложенные корни рабочей области дают несколько узлов с одним путём
+        self._scan_nodes = {}
+        for root_node in root_nodes:
+            self._scan_nodes.setdefault(root_node.path, []).append(root_node)
+        if self.is_workspace:
+            self._scan_worker = WorkspaceScanWorker(self.directory_scanner, self.workspace_roots)
+        else:
+            self._scan_worker = ScanWorker(self.directory_scanner, self.current_directory)
+        self._scan_worker.start()
+        self.cancel_button.config(state=tk.NORMAL)
+        self.update_status(f"Сканирование: {self._scan_worker.root_path}")
+        self.root.after(SCAN_POLL_INTERVAL, self._poll_scan, self._scan_worker)
+        
+    def _poll_scan(self, worker: ScanWorker) -> None:
+        """Перенос готовых результатов сканирования из очереди в дерево"""
+        if worker is not self._scan_worker:
+            return
+            
+        deadline = time.perf_counter() + SCAN_POLL_BUDGET
+        done = False
+        while time.perf_counter() < deadline:
+            try:
+                batch = worker.queue.get_nowait()
+            except queue.Empty:
+                break
+            if batch is ScanWorker.DONE:
+                done = True
+                break
+            self._insert_scan_batch(batch, self._scan_nodes)
+            
+        if done:
+            self._finish_scan(worker)
+        else:
+            self.update_status(
+                f"Сканирование... каталогов: {worker.dirs_scanned}, "
+                f"элементов: {worker.entries_scanned}"
+            )
+            self.root.after(SCAN_POLL_INTERVAL, self._poll_scan, worker)
+            
+    def _insert_scan_batch(self, batch: list, nodes: dict) -> None:
+        """
+        Добавление пачки просканированных директорий в дерево.
+        nodes - списки узлов ещё не заполненных директорий по их путям
+        (в рабочей области с вложенными корнями путь встречается несколько раз).
+        """
+        with self.scan_metrics.phase("insert"), self.tree_view.suspended():
+            for dir_path, entries in batch:
+                parents = nodes.get(dir_path)
+                if not parents:
+                    continue
+                parent = parents.pop()
+                if not parents:
+                    del nodes[dir_path]
+                children = self.tree_view.add_children(parent, entries)
+                for entry, node in zip(entries, children):
+                    if entry.is_dir:
+                        nodes.setdefault(entry.path, []).append(node)
+                    
+    def _load_children(self, node: TreeNode) -> None:
+        """Загрузка содержимого одной директории (ленивый режим)"""
+        path = node.path
+        entries = self.directory_scanner.scan_entries(path)
+        with self.scan_metrics.phase("insert"):
+            self.tree_view.add_children_paced(
+                node,
+                entries,
+                on_done=lambda: self.tree_view.update_totals(node)
+            )
+        if self._watcher is not None:
+            self._watcher.watch(path)
+            
+    def _schedule_filter(self) -> None:
+        """Отложенное применение фильтра: быстрый ввод не вызывает поиск на каждый символ"""
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(FILTER_DELAY, self._apply_filter)
+        
+    def _apply_filter(self) -> None:
+        """Показ в дереве только узлов с подходящими именами и их предков"""
+        self._filter_job = None
+        query = self.filter_text.get().strip()
+        if not query:
+            self.tree_view.clear_filter()
+            return
+        start = time.perf_counter()
+        nodes = self.tree_model.index.search(query, FILTER_LIMIT)
+        shown = self.tree_view.apply_filter(nodes)
+        elapsed = (time.perf_counter() - start) * 1000
+        more = ", показаны не все" if len(nodes) >= FILTER_LIMIT else ""
+        self.update_status(f"Найдено: {shown} ({elapsed:.0f} мс{more})")
+        
+    def _on_stats_mode_changed(self) -> None:
+        """Включение и выключение сбора размеров файлов и итогов по директориям"""
+        enabled = self.stats_mode.get()
+        self.directory_scanner.collect_stats = enabled
+        self.structure_exporter.with_stats = enabled
+        self.tree_view.show_stats(enabled)
+        if self.current_directory:
+            self._scan_directory()
+            
+    def _on_gitignore_mode_changed(self) -> None:
+        """Включение и выключение учёта правил .gitignore/.ignore"""
+        self.directory_scanner.use_gitignore = self.gitignore_mode.get()
+        if self.current_directory:
+            # Листинги проверяются заново: файлы .gitignore/.ignore могли
+            # появиться или исчезнуть, пока их правила не учитывались
+            self._scan_directory()
+            
+    def _on_virtual_mode_changed(self) -> None:
+        """
+        Переключение между обычным деревом и виртуализированным списком,
+        который отрисовывает только видимые строки (для директорий
+        с сотнями тысяч элементов). Оба вида показывают одну модель дерева,
+        поэтому новый вид строится из неё без пересканирования, а ручные
+        исключения сохраняются.
+        """
+        self.tree_view.destroy()
+        view_class = VirtualTreeView if self.virtual_mode.get() else TreeView
+        self.tree_view = view_class(self.tree_container, self.tree_model)
+        self.tree_view.lazy = self.lazy_mode.get()
+        self.tree_view.show_stats(self.stats_mode.get())
+        self._bind_tree_view_events()
+        self.tree_view.show_model()
+        if self._scan_worker is None and not self.tree_view.lazy:
+            # Директории, не прочитанные из-за ограничений или добавленные при
+            # наблюдении, загружаются при раскрытии; во время сканирования их
+            # заполнит фоновый обход
+            self.tree_view.add_placeholders(
+                node for node in self.tree_model.iter_nodes() if node.is_dir and not node.loaded
+            )
+        self.tree_view.refresh_totals()
+        if self.filter_text.get().strip():
+            self._apply_filter()
+            
+    def _on_parallel_mode_changed(self) -> None:
+        """Переключение параллельного чтения директорий (для сетевых дисков)"""
+        self.directory_scanner.workers = SCAN_WORKERS if self.parallel_mode.get() else 1
+        self.update_status(
+            f"Параллельное чтение директорий, потоков: {SCAN_WORKERS}" if self.parallel_mode.get()
+            else "Последовательное чтение директорий"
         )
-        self._scan_recursive(root_node, self.current_directory)
-        self.update_status(f"Загружена структура директории: {self.current_directory}")
-        
-    def _scan_recursive(self, parent: str, path: str) -> None:
-        """Рекурсивное сканирование директории"""
-        items = self.directory_scanner.scan_directory(path)
-        for name, full_path, item_type in items:
-            icon = "🗀 " if item_type == 'dir' else "📄 "
-            node = self.tree_view.add_item(parent, icon + name, [full_path])
-            if item_type == 'dir':
-                self._scan_recursive(node, full_path)
+        
+    def _on_lazy_mode_changed(self) -> None:
+        """Переключение режима загрузки дерева"""
+        if self.current_directory:
+            self._scan_directory()
+            
+    def _finish_scan(self, worker: ScanWorker) -> None:
+        """Завершение фонового сканирования"""
+        # Оставшиеся узлы - директории, не прочитанные из-за ограничений обхода
+        self.tree_view.add_placeholders(
+            node for nodes in self._scan_nodes.values() for node in nodes
+        )
+        self.scan_metrics.finish()
+        self._scan_worker = None
+        self._scan_nodes = {}
+        self.directory_scanner.revalidate_cache = True
+        self.cancel_button.config(state=tk.DISABLED)
+        self.tree_view.refresh_totals()
+        if self.filter_text.get().strip():
+            self._apply_filter()
+        if worker.error is not None:
+            self.update_status(f"Ошибка при сканировании: {str(worker.error)}")
+        elif worker.truncated:
+            self.update_status(
+                f"Сканирование остановлено по ограничениям: {worker.root_path} "
+                f"(элементов: {worker.entries_scanned}); "
+                f"непрочитанные директории загружаются при раскрытии"
+            )
+            self._start_watching()
+        else:
+            self.update_status(
+                f"Загружена структура директории: {worker.root_path} "
+                f"(элементов: {worker.entries_scanned}; {self.scan_metrics.summary()})"
+            )
+            self._start_watching()
+            
+    def _stop_scan_worker(self) -> None:
+        """Остановка текущего фонового сканирования"""
+        if self._scan_worker is not None:
+            self._scan_worker.cancel()
+            self._scan_worker = None
+        self._scan_nodes = {}
+        self.directory_scanner.revalidate_cache = True
+        self.cancel_button.config(state=tk.DISABLED)
+        
+    def _cancel_scan(self) -> None:
+        """Отмена сканирования по кнопке"""
+        worker = self._scan_worker
+        if worker is None:
+            return
+        self._stop_scan_worker()
+        self.update_status(
+            f"Сканирование отменено (каталогов: {worker.dirs_scanned}, "
+            f"элементов: {worker.entries_scanned})"
+        )
+        
+    def _on_watch_mode_changed(self) -> None:
+        """Включение и выключение наблюдения за файловой системой"""
+        if self.watch_mode.get():
+            self._start_watching()
+        else:
+            self._stop_watching()
+            self.update_status("Наблюдение за изменениями выключено")
+            
+    def _start_watching(self) -> None:
+        """Запуск наблюдения за загруженными в дерево директориями"""
+        if not self.watch_mode.get() or not self.current_directory or self._scan_worker is not None:
+            return
+            
+        self._stop_watching()
+        self._watcher = create_watcher()
+        directories = self.tree_view.get_loaded_directories()
+        for path in directories:
+            self._watcher.watch(path)
+        self._watcher.start()
+        self.update_status(f"Наблюдение за изменениями: {len(directories)} каталогов")
+        self.root.after(WATCH_POLL_INTERVAL, self._poll_fs_changes, self._watcher)
+        
+    def _stop_watching(self) -> None:
+        """Остановка наблюдения за файловой системой"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+            
+    def _poll_fs_changes(self, watcher: PollingWatcher) -> None:
+        """Применение накопленных изменений файловой системы к дереву"""
+        if watcher is not self._watcher:
+            return
+            
+        changed = watcher.drain()
+        if changed:
+            self.directory_scanner.revalidate_cache = True
+            refreshed = sum(self._refresh_directory(path) for path in sorted(changed))
+            if refreshed:
+                self._update_excluded_count()
+                self.update_status(f"Обновлено каталогов: {refreshed}")
+        self.root.after(WATCH_POLL_INTERVAL, self._poll_fs_changes, watcher)
+        
+    def _refresh_directory(self, path: str) -> bool:
+        """
+        Синхронизация содержимого одной директории с диском: удаляются только
+        исчезнувшие элементы и добавляются новые, остальные узлы (и их
+        исключения) не затрагиваются
+        """
+        node = self.tree_model.find(path)
+        if node is None or not node.is_dir or not node.loaded or self.tree_view.is_pending(node):
+            return False
+            
+        entries = self.directory_scanner.scan_entries(path)
+        current = {child.name: child for child in node.children}
+        new_names = {entry.name for entry in entries}
+        for name, child in current.items():
+            if name not in new_names:
+                self._watcher.unwatch(os.path.join(path, name))
+                self.tree_view.remove_node(child)
                 
+        new_dirs = []
+        for index, entry in enumerate(entries):
+            if entry.name in current:
+                continue
+            child = self.tree_view.insert_child(node, entry, index)
+            if entry.is_dir:
+                new_dirs.append(child)
+                
+        # Новые директории не обходятся в потоке интерфейса (сборка может создать
+        # большое дерево): и в полном режиме они загружаются при раскрытии
+        if not self.tree_view.lazy:
+            self.tree_view.add_placeholders(new_dirs)
+        self.tree_view.update_totals(node)
+        return True
+        
     def _save_structure(self) -> None:
         """Сохранение структуры в файл"""
         if not self.current_directory:
             messagebox.showwarning("Предупреждение", "Сначала выберите директорию!")
             return
 
+        writer = WRITERS[self.export_format.get()]
+        name = "workspace" if self.is_workspace else os.path.basename(self.current_directory)
         save_path = filedialog.asksaveasfilename(
-            defaultextension=".txt",
-            filetypes=[("Текстовые файлы", "*.txt"), ("Все файлы", "*.*")],
-            initialfile=f"structure_{os.path.basename(self.current_directory)}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            defaultextension=writer.extension,
+            filetypes=[(writer.title, f"*{writer.extension}"), ("Все файлы", "*.*")],
+            initialfile=f"structure_{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{writer.extension}"
         )
         if not save_path:
             return
@@ -196,91 +650,223 @@ class MainWindow:
             self.update_status(f"Ошибка при сохранении: {str(e)}")
             
     def _save_tree_to_file(self, save_path: str) -> None:
-        """Сохранение дерева в файл"""
-        def traverse(iid: str, depth: int = 0) -> list:
-            if iid in self.tree_view.excluded_items:
-                return []
-            item_text = self.tree_view.get_item_text(iid)
-            if item_text.startswith(("🗀 ", "📄 ")):
-                item_text = item_text[2:]
-            lines = [f"{'    '*depth}{item_text}"]
-            for child in self.tree_view.tree.get_children(iid):
-                lines.extend(traverse(child, depth + 1))
-            return lines
-            
-        lines = []
-        for root_item in self.tree_view.tree.get_children():
-            lines.extend(traverse(root_item, 0))
-            
-        with open(save_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(lines))
+        """Сохранение структуры в файл (потоковый обход модели дерева)"""
+        with self.scan_metrics.phase("export"):
+            self.scan_metrics.profiled(
+                self.structure_exporter.export,
+                self.tree_model.root, save_path, self.export_format.get()
+            )
+            
+    def _on_profile_mode_changed(self) -> None:
+        """Включение и выключение снятия профиля cProfile при сканировании и выгрузке"""
+        self.scan_metrics.profile = self.profile_mode.get()
+        if self.scan_metrics.profile:
+            self.update_status("Профиль cProfile будет снят при следующем сканировании")
             
+    def _save_metrics_report(self) -> None:
+        """Сохранение полного отчёта о замерах в JSON"""
+        save_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Все файлы", "*.*")],
+            initialfile=f"metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        if not save_path:
+            return
+        try:
+            self.scan_metrics.save(save_path)
+            self.update_status(f"Отчёт о замерах сохранён в файл: {save_path}")
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить файл: {str(e)}")
+            
+    def _find_duplicates(self) -> None:
+        """Поиск дубликатов среди неисключённых файлов дерева в фоновом потоке"""
+        root_node = self.tree_model.root
+        if root_node is None:
+            messagebox.showwarning("Предупреждение", "Сначала выберите директорию!")
+            return
+        if self._duplicates_thread is not None and self._duplicates_thread.is_alive():
+            return
+            
+        # Модель меняется в потоке интерфейса (сканирование, наблюдение), поэтому
+        # пути загруженных файлов собираются здесь, а фоновый поток читает
+        # с диска только незагруженные директории
+        files = []
+        unloaded = []
+        stack = [root_node]
+        while stack:
+            node = stack.pop()
+            if node.excluded:
+                continue
+            if not node.is_dir:
+                files.append(node.path)
+            elif node.loaded:
+                stack.extend(node.children)
+            else:
+                unloaded.append(node.path)
+        result: dict = {}
+        
+        def run():
+            from ..core.duplicate_finder import iter_files
+            try:
+                paths = itertools.chain(files, *(iter_files(self.directory_scanner, path)
+                                                 for path in unloaded))
+                if self.is_workspace:
+                    # Файлы вложенных корней рабочей области встречаются повторно
+                    paths = iter(dict.fromkeys(paths))
+                result["groups"] = self.duplicate_finder.find(paths)
+            except Exception as e:
+                result["error"] = e
+                
+        self._duplicates_thread = threading.Thread(target=run, daemon=True)
+        self._duplicates_thread.start()
+        self.update_status("Поиск дубликатов...")
+        self._poll_duplicates(self._duplicates_thread, result)
+        
+    def _poll_duplicates(self, thread: threading.Thread, result: dict) -> None:
+        """Ожидание результата поиска дубликатов"""
+        if thread.is_alive():
+            self.root.after(SCAN_POLL_INTERVAL, self._poll_duplicates, thread, result)
+            return
+        self._duplicates_thread = None
+        if "error" in result:
+            self.update_status(f"Ошибка при поиске дубликатов: {str(result['error'])}")
+            return
+        from ..core.duplicate_finder import wasted_total
+        groups = result["groups"]
+        self.update_status(
+            f"Групп дубликатов: {len(groups)}, "
+            f"лишнее место: {format_size(wasted_total(groups))}"
+        )
+        self._show_duplicates_dialog(groups)
+        
+    def _show_duplicates_dialog(self, groups: List["DuplicateGroup"]) -> None:
+        """Отображение групп дубликатов"""
+        from ..core.duplicate_finder import export_duplicates, wasted_total
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Дубликаты файлов")
+        dialog.geometry("700x500")
+        dialog.transient(self.root)
+        
+        frame = ttk.Frame(dialog, padding="5")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(
+            frame,
+            text=f"Групп: {len(groups)}, лишнее место: {format_size(wasted_total(groups))}"
+        ).pack(fill=tk.X)
+        
+        # Группы с путями файлов в виде дерева
+        list_frame = ttk.Frame(frame)
+        list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        scrollbar = ttk.Scrollbar(list_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        groups_tree = ttk.Treeview(list_frame, columns=("wasted",), 
+                                   yscrollcommand=scrollbar.set)
+        groups_tree.heading("#0", text="Файлы")
+        groups_tree.heading("wasted", text="Лишнее место")
+        groups_tree.column("wasted", width=120, stretch=False, anchor=tk.E)
+        groups_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        scrollbar.config(command=groups_tree.yview)
+        
+        for group in groups:
+            item = groups_tree.insert(
+                "", "end",
+                text=f"{format_size(group.size)} x {len(group.paths)}",
+                values=(format_size(group.wasted),)
+            )
+            for path in group.paths:
+                groups_tree.insert(item, "end", text=path)
+                
+        def save_report():
+            save_path = filedialog.asksaveasfilename(
+                parent=dialog,
+                defaultextension=".txt",
+                filetypes=[("Текстовые файлы", "*.txt"), ("JSON", "*.json"), ("Все файлы", "*.*")],
+                initialfile=f"duplicates_{os.path.basename(self.current_directory or '')}.txt"
+            )
+            if not save_path:
+                return
+            try:
+                export_duplicates(groups, save_path)
+                self.update_status(f"Отчёт о дубликатах сохранён в файл: {save_path}")
+            except Exception as e:
+                messagebox.showerror("Ошибка", f"Не удалось сохранить файл: {str(e)}", parent=dialog)
+                
+        ttk.Button(frame, text="Сохранить отчёт", command=save_report).pack(fill=tk.X, pady=5)
+        ttk.Button(frame, text="Закрыть", command=dialog.destroy).pack(fill=tk.X)
+        
     def _exclude_selected(self) -> None:
         """Исключение выбранных элементов"""
-        selected_items = self.tree_view.get_selected_items()
+        selected_items = self.tree_view.get_selected_nodes()
         if not selected_items:
             self.update_status("Не выбраны элементы для исключения")
             return
             
-        self.tree_view.exclude_items(selected_items)
-        self.update_status(f"Исключено элементов: {len(selected_items)}")
+        count = self.tree_view.exclude_nodes(selected_items)
+        self.update_status(f"Исключено элементов: {count}")
         self._update_excluded_count()
         
     def _include_selected(self) -> None:
         """Включение выбранных элементов"""
-        selected_items = self.tree_view.get_selected_items()
+        selected_items = self.tree_view.get_selected_nodes()
         if not selected_items:
             self.update_status("Не выбраны элементы для включения")
             return
             
-        self.tree_view.include_items(selected_items)
-        self.update_status(f"Включено обратно элементов: {len(selected_items)}")
+        count = self.tree_view.include_nodes(selected_items)
+        self.update_status(f"Включено обратно элементов: {count}")
         self._update_excluded_count()
         
     def _clear_exclusions(self) -> None:
         """Очистка всех исключений"""
-        if not self.tree_view.excluded_items:
+        if not self.tree_model.excluded_count:
             self.update_status("Нет исключенных элементов")
             return
             
-        count = len(self.tree_view.excluded_items)
-        self.tree_view.excluded_items.clear()
-        for item in self.tree_view.tree.get_children():
-            self.tree_view.tree.item(item, tags=())
+        count = self.tree_view.clear_exclusions()
         self.update_status(f"Очищены все исключения ({count} элементов)")
         self._update_excluded_count()
         
     def _add_to_patterns(self) -> None:
         """Добавление выбранных элементов в шаблоны"""
-        selected_items = self.tree_view.get_selected_items()
+        selected_items = self.tree_view.get_selected_nodes()
         if not selected_items:
             return
             
         added_count = 0
-        for item in selected_items:
-            item_text = self.tree_view.get_item_text(item)
-            if item_text.startswith(("🗀 ", "📄 ")):
-                item_text = item_text[2:]
-                
-            if item_text not in self.directory_scanner.excluded_patterns:
-                self.directory_scanner.excluded_patterns.add(item_text)
+        for node in selected_items:
+            # У корня в name полный путь, у служебного корня рабочей области - пустая строка
+            if node.is_workspace:
+                continue
+            name = node.display_name
+            if name not in self.directory_scanner.excluded_patterns:
+                self.directory_scanner.excluded_patterns.add(name)
                 added_count += 1
                 
                 # Автоматически исключаем элемент
-                self.tree_view.exclude_items([item])
+                self.tree_view.exclude_nodes([node])
                 
         if added_count > 0:
+            self.directory_scanner.update_patterns()
             profile_name = self.current_profile.get()
             if profile_name != "Стандартный":
-                self.profile_manager.save_profile(profile_name, self.directory_scanner.excluded_patterns)
+                try:
+                    self.profile_manager.save_profile(profile_name,
+                                                      self.directory_scanner.excluded_patterns)
+                except Exception as e:
+                    messagebox.showerror("Ошибка", str(e))
+                    return
                 self.update_status(f"Добавлено {added_count} шаблонов исключений")
                 self._update_excluded_count()
                 
     def _on_double_click(self, event) -> None:
         """Обработка двойного клика по элементу"""
-        item = self.tree_view.get_selected_items()[0]
-        if item:
-            path = self.tree_view.get_item_values(item)[0]
+        selected_items = self.tree_view.get_selected_nodes()
+        if selected_items:
+            path = selected_items[0].path
             if os.path.isdir(path):
                 os.startfile(path)
                 self.update_status(f"Открыта директория: {path}")
@@ -289,9 +875,17 @@ class MainWindow:
         """Обработка изменения профиля"""
         profile_name = self.current_profile.get()
         self.directory_scanner.excluded_patterns = self.profile_manager.get_profile(profile_name)
-        self.update_status(f"Загружен профиль: {profile_name}")
+        unsupported = self.directory_scanner.matcher.unsupported
+        if unsupported:
+            self.update_status(
+                f"Загружен профиль: {profile_name}; не применяются шаблоны с '/' в начале: "
+                f"{', '.join(sorted(unsupported))}"
+            )
+        else:
+            self.update_status(f"Загружен профиль: {profile_name}")
         if self.current_directory:
-            self._scan_directory()
+            # Структура на диске не менялась - достаточно заново отфильтровать кэш
+            self._scan_directory(revalidate=False)
             
     def _save_current_profile(self) -> None:
         """Сохранение текущего профиля"""
@@ -301,6 +895,8 @@ class MainWindow:
             self.update_status(f"Профиль {profile_name} сохранен")
         except ValueError as e:
             messagebox.showwarning("Предупреждение", str(e))
+        except Exception as e:
+            messagebox.showerror("Ошибка", str(e))
             
     def _save_profile_as(self) -> None:
         """Сохранение профиля под новым именем"""
@@ -322,7 +918,11 @@ class MainWindow:
                 messagebox.showwarning("Предупреждение", "Нельзя использовать название 'Стандартный'")
                 return
                 
-            self.profile_manager.save_profile(name, self.directory_scanner.excluded_patterns)
+            try:
+                self.profile_manager.save_profile(name, self.directory_scanner.excluded_patterns)
+            except Exception as e:
+                messagebox.showerror("Ошибка", str(e), parent=dialog)
+                return
             self.profile_combo['values'] = self.profile_manager.get_profile_names()
             self.current_profile.set(name)
             self.update_status(f"Создан новый профиль: {name}")
@@ -348,7 +948,71 @@ class MainWindow:
                 self.update_status(f"Удален профиль: {profile_name}")
         except ValueError as e:
             messagebox.showwarning("Предупреждение", str(e))
+        except Exception as e:
+            messagebox.showerror("Ошибка", str(e))
+            
+    def _show_limits_dialog(self) -> None:
+        """Отображение диалога ограничений сканирования"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Ограничения сканирования")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        frame = ttk.Frame(dialog, padding="5")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        limits = self.directory_scanner.limits
+        
+        def limit_text(value) -> str:
+            return "" if value is None else str(value)
+            
+        fields = (
+            ("Максимальная глубина:", limit_text(limits.max_depth)),
+            ("Максимум элементов:", limit_text(limits.max_entries)),
+            ("Время сканирования (с):", limit_text(limits.timeout)),
+        )
+        entries = []
+        for row, (label, value) in enumerate(fields):
+            ttk.Label(frame, text=label).grid(row=row, column=0, sticky=tk.W, pady=2)
+            entry = ttk.Entry(frame, width=12)
+            entry.insert(0, value)
+            entry.grid(row=row, column=1, sticky=tk.W, padx=(5, 0), pady=2)
+            entries.append(entry)
             
+        follow_symlinks = tk.BooleanVar(value=limits.follow_symlinks)
+        ttk.Checkbutton(frame, text="Переходить по символическим ссылкам", 
+                        variable=follow_symlinks).grid(row=3, column=0, columnspan=2, sticky=tk.W)
+        cross_mounts = tk.BooleanVar(value=limits.cross_mounts)
+        ttk.Checkbutton(frame, text="Заходить в другие файловые системы", 
+                        variable=cross_mounts).grid(row=4, column=0, columnspan=2, sticky=tk.W)
+        ttk.Label(frame, text="Пустое поле - без ограничения", 
+                  font=("", 9, "italic")).grid(row=5, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        
+        def apply():
+            try:
+                max_depth, max_entries = (
+                    int(entry.get()) if entry.get().strip() else None for entry in entries[:2]
+                )
+                timeout = float(entries[2].get()) if entries[2].get().strip() else None
+            except ValueError:
+                messagebox.showwarning("Предупреждение", "Ограничения должны быть числами", 
+                                       parent=dialog)
+                return
+            self.directory_scanner.limits = ScanLimits(
+                max_depth=max_depth,
+                max_entries=max_entries,
+                timeout=timeout,
+                follow_symlinks=follow_symlinks.get(),
+                cross_mounts=cross_mounts.get()
+            )
+            dialog.destroy()
+            self.update_status("Ограничения сканирования изменены")
+            if self.current_directory:
+                self._scan_directory(revalidate=False)
+                
+        ttk.Button(frame, text="Применить", command=apply).grid(
+            row=6, column=0, columnspan=2, sticky=tk.EW, pady=(5, 0))
+        
     def _show_patterns_dialog(self) -> None:
         """Отображение диалога управления шаблонами"""
         dialog = tk.Toplevel(self.root)
@@ -387,8 +1051,17 @@ class MainWindow:
         
         def add_pattern():
             pattern = entry.get().strip()
+            if is_anchored(pattern):
+                messagebox.showwarning(
+                    "Предупреждение",
+                    "Шаблоны с '/' в начале (привязка к корню) не поддерживаются: "
+                    "шаблон совпадает с именем на любой глубине",
+                    parent=dialog
+                )
+                return
             if pattern and pattern not in self.directory_scanner.excluded_patterns:
                 self.directory_scanner.excluded_patterns.add(pattern)
+                self.directory_scanner.update_patterns()
                 patterns_list.insert(tk.END, pattern)
                 entry.delete(0, tk.END)
                 self.update_status(f"Добавлен шаблон: {pattern}")
@@ -403,6 +1076,7 @@ class MainWindow:
                 if pattern not in DEFAULT_EXCLUDES:
                     self.directory_scanner.excluded_patterns.remove(pattern)
                     patterns_list.delete(patterns_list.index(pattern))
+            self.directory_scanner.update_patterns()
                     
             self.update_status(f"Удалено шаблонов: {len(patterns_to_remove)}")
             
@@ -414,4 +1088,68 @@ class MainWindow:
         dialog.update_idletasks()
         x = self.root.winfo_x() + (self.root.winfo_width() - dialog.winfo_width()) // 2
         y = self.root.winfo_y() + (self.root.winfo_height() - dialog.winfo_height()) // 2
-        dialog.geometry(f"+{x}+{y}") 
\ No newline at end of file
+        dialog.geometry(f"+{x}+{y}") 
+        
+    def _show_workspace_dialog(self) -> None:
+        """
+        Отображение диалога рабочей области: несколько директорий сканируются
+        одновременно и показываются в одном дереве
+        """
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Рабочая область")
+        dialog.geometry("500x400")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        frame = ttk.Frame(dialog, padding="5")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text="Директории рабочей области:").pack(fill=tk.X)
+        
+        # Список с прокруткой
+        list_frame = ttk.Frame(frame)
+        list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        scrollbar = ttk.Scrollbar(list_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        roots_list = tk.Listbox(list_frame, selectmode=tk.EXTENDED, 
+                                yscrollcommand=scrollbar.set)
+        roots_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        scrollbar.config(command=roots_list.yview)
+        
+        for path in self.workspace_roots:
+            roots_list.insert(tk.END, path)
+            
+        def add_directory():
+            directory = filedialog.askdirectory(parent=dialog, title="Добавить директорию")
+            if directory and directory not in roots_list.get(0, tk.END):
+                roots_list.insert(tk.END, directory)
+                
+        def remove_selected():
+            for index in reversed(roots_list.curselection()):
+                roots_list.delete(index)
+                
+        def scan():
+            roots = list(roots_list.get(0, tk.END))
+            dialog.destroy()
+            if not roots:
+                return
+            self._set_workspace(roots)
+            self._scan_directory()
+            
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X, pady=5)
+        ttk.Button(button_frame, text="Добавить...", 
+                   command=add_directory).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+        ttk.Button(button_frame, text="Удалить выбранные", 
+                   command=remove_selected).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(frame, text="Сканировать", command=scan).pack(fill=tk.X, pady=(0, 5))
+        ttk.Button(frame, text="Закрыть", command=dialog.destroy).pack(fill=tk.X)
+        
+        # Центрируем диалог
+        dialog.update_idletasks()
+        x = self.root.winfo_x() + (self.root.winfo_width() - dialog.winfo_width()) // 2
+        y = self.root.winfo_y() + (self.root.winfo_height() - dialog.winfo_height()) // 2
+        dialog.geometry(f"+{x}+{y}")
@@ -1,10 +1,70 @@
 import tkinter as tk
 from tkinter import ttk
-from typing import Callable, Set, Optional
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from ..core.directory_scanner import ScanEntry
+from ..core.tree_model import TreeModel, TreeNode
+from ..core.export_writers import format_mtime, format_size
+
+# Текст временного дочернего элемента незагруженной директории
+PLACEHOLDER_TEXT = "..."
+# Суффикс идентификатора временного элемента
+PLACEHOLDER_SUFFIX = ":placeholder"
+
+# Сколько элементов вставляется одним вызовом Tcl
+BULK_CHUNK = 2000
+
+# Процедура Tcl для пакетной вставки: один переход Python -> Tcl на пачку
+BULK_INSERT_PROC = "dir_tree_bulk_insert"
+BULK_INSERT_SCRIPT = """
+proc %s {w parent placeholder items} {
+    foreach {iid text tags values lazy} $items {
+        $w insert $parent end -id $iid -text $text -tags $tags -values $values
+        if {$lazy} {
+            $w insert $iid end -id "$iid%s" -text $placeholder
+        }
+    }
+}
+""" % (BULK_INSERT_PROC, PLACEHOLDER_SUFFIX)
+
+# Дополнительные колонки со статистикой: идентификатор, заголовок, ширина
+STATS_COLUMNS = (
+    ("size", "Размер", 90),
+    ("files", "Файлов", 70),
+    ("dirs", "Папок", 70),
+    ("mtime", "Изменён", 120),
+)
+
+
+def stats_values(node: TreeNode) -> tuple:
+    """Значения колонок статистики для узла"""
+    if not node.is_dir:
+        return (format_size(node.size), "", "", format_mtime(node.mtime))
+    if not node.loaded:
+        return ("", "", "", format_mtime(node.mtime))
+    return (format_size(node.size), node.files, node.dirs, format_mtime(node.mtime))
 
 class TreeView:
-    def __init__(self, parent: ttk.Frame):
-        self.tree = ttk.Treeview(parent, selectmode="extended")
+    """
+    Отображение модели дерева каталогов в ttk.Treeview.
+    
+    Данные (имена, пути, флаги исключения) хранятся в TreeModel, виджет лишь
+    показывает загруженные узлы: идентификатор элемента Treeview - это id узла.
+    """
+    
+    def __init__(self, parent: ttk.Frame, model: TreeModel):
+        self.model = model
+        self.tree = ttk.Treeview(
+            parent,
+            selectmode="extended",
+            columns=[column for column, _, _ in STATS_COLUMNS],
+            displaycolumns=()
+        )
+        for column, heading, width in STATS_COLUMNS:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor=tk.E, stretch=False)
+        self.stats = False
         self.tree_scroll = ttk.Scrollbar(parent, orient="vertical", command=self.tree.yview)
         self.tree.configure(yscrollcommand=self.tree_scroll.set)
         
@@ -16,8 +76,23 @@ class TreeView:
         self.tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        # Набор исключённых элементов
-        self.excluded_items: Set[str] = set()
+        # Узлы модели, показанные в виджете
+        self._nodes: Dict[str, TreeNode] = {}
+        
+        # Ленивый режим: содержимое директорий загружается при раскрытии
+        self.lazy = False
+        self._loader: Optional[Callable[[TreeNode], None]] = None
+        self._placeholders: Set[str] = set()
+        
+        # Пакетная вставка: директории, чьё содержимое ещё вставляется,
+        # число активных загрузок и поколение (сбрасывается при очистке)
+        self.tree.tk.eval(BULK_INSERT_SCRIPT)
+        self._pending: Set[int] = set()
+        self._suspended = 0
+        self._generation = 0
+        
+        # Фильтр: директории, у которых в виджете оставлена часть потомков
+        self._filtered: Dict[str, TreeNode] = {}
         
         # Настройка тегов
         self.tree.tag_configure("excluded", foreground="red")
@@ -40,45 +115,356 @@ class TreeView:
         self.tree.bind("<Double-1>", on_double_click)
         self.tree.bind("<Delete>", lambda e: on_exclude())
         self.tree.bind("<Control-a>", self._select_all)
+        self.tree.bind("<<TreeviewOpen>>", self._on_open)
+        
+    def set_loader(self, loader: Optional[Callable[[TreeNode], None]]) -> None:
+        """Установка функции загрузки содержимого директории для ленивого режима"""
+        self._loader = loader
+        
+    def destroy(self) -> None:
+        """Удаление виджетов (при смене режима отображения)"""
+        # Незавершённые пакетные вставки прекращаются
+        self._generation += 1
+        self.popup_menu.destroy()
+        self.tree_scroll.destroy()
+        self.tree.destroy()
         
     def clear(self) -> None:
         """Очистка дерева"""
         for item in self.tree.get_children():
             self.tree.delete(item)
-        self.excluded_items.clear()
+        self.model.clear()
+        self._nodes.clear()
+        self._placeholders.clear()
+        self._filtered.clear()
+        if self._pending:
+            self._pending.clear()
+            self._resume_scroll()
+        self._generation += 1
+        
+    def show_stats(self, show: bool) -> None:
+        """Показ или скрытие колонок со статистикой"""
+        self.stats = show
+        self.tree.configure(displaycolumns=[c for c, _, _ in STATS_COLUMNS] if show else ())
         
-    def add_root(self, text: str, values: list) -> str:
+    def _values(self, node: TreeNode) -> tuple:
+        """Значения колонок статистики для узла"""
+        if not self.stats:
+            return ()
+        return stats_values(node)
+        
+    def update_totals(self, node: Optional[TreeNode]) -> None:
+        """Обновление колонок статистики директории и всех её предков"""
+        if not self.stats:
+            return
+        while node is not None:
+            iid = str(node.id)
+            if iid in self._nodes:
+                self.tree.item(iid, values=self._values(node))
+            node = node.parent
+            
+    def refresh_totals(self) -> None:
+        """Обновление колонок статистики всех загруженных директорий"""
+        if not self.stats:
+            return
+        for node in self.model.iter_nodes():
+            iid = str(node.id)
+            if node.is_dir and iid in self._nodes:
+                self.tree.item(iid, values=self._values(node))
+                
+    def add_root(self, path: str) -> TreeNode:
         """Добавление корневого элемента"""
-        return self.tree.insert("", "end", text=text, open=True, values=values)
+        node = self.model.set_root(path)
+        self._insert_top("", node)
+        return node
+        
+    def add_workspace(self, paths: Iterable[str]) -> List[TreeNode]:
+        """Добавление рабочей области: служебный корень и по элементу на каждую директорию"""
+        roots = self.model.set_workspace(paths)
+        self._insert_top("", self.model.root)
+        for node in roots:
+            self._insert_top(str(self.model.root.id), node)
+        return roots
+        
+    def _insert_top(self, parent_iid: str, node: TreeNode) -> None:
+        """Раскрытый элемент корня или корневой директории рабочей области"""
+        iid = str(node.id)
+        self.tree.insert(parent_iid, "end", iid=iid, text=node.display_name, open=True,
+                         tags=("excluded",) if node.excluded else ())
+        self._nodes[iid] = node
+        
+    def show_model(self) -> None:
+        """
+        Построение элементов по уже загруженной модели (при смене вида):
+        исключения и загруженные директории сохраняются без пересканирования.
+        Временные элементы непрочитанных директорий в полном режиме
+        добавляются отдельно (add_placeholders)
+        """
+        root = self.model.root
+        if root is None:
+            return
+        self._insert_top("", root)
+        stack = [root]
+        if root.is_workspace:
+            for node in root.children:
+                self._insert_top(str(root.id), node)
+            stack = list(root.children)
+        while stack:
+            node = stack.pop()
+            if not node.loaded:
+                continue
+            for start in range(0, len(node.children), BULK_CHUNK):
+                self._insert_chunk(str(node.id), node.children[start:start + BULK_CHUNK])
+            stack.extend(child for child in node.children if child.is_dir)
         
-    def add_item(self, parent: str, text: str, values: list) -> str:
-        """Добавление элемента в дерево"""
-        return self.tree.insert(parent, "end", text=text, values=values)
+    def add_children(self, parent: TreeNode, entries: Iterable[ScanEntry]) -> List[TreeNode]:
+        """Заполнение директории прочитанными записями (пачками по BULK_CHUNK)"""
+        children = self.model.add_children(parent, entries)
+        parent_iid = str(parent.id)
+        with self.suspended():
+            for start in range(0, len(children), BULK_CHUNK):
+                self._insert_chunk(parent_iid, children[start:start + BULK_CHUNK])
+        return children
         
-    def exclude_items(self, items: list) -> None:
-        """Исключение элементов"""
-        for item in items:
-            self.excluded_items.add(item)
-            self.tree.item(item, tags=("excluded",))
+    @contextmanager
+    def suspended(self):
+        """
+        Отключение обновления полосы прокрутки на время массовой вставки
+        (например, пачки результатов сканирования). Вложенные вызовы допустимы,
+        прокрутка возобновляется при выходе из внешнего, если нет пакетных загрузок
+        """
+        self._suspended += 1
+        if self._suspended == 1:
+            self.tree.configure(yscrollcommand="")
+        try:
+            yield
+        finally:
+            self._suspended -= 1
+            if not self._suspended and not self._pending:
+                self._resume_scroll()
+        
+    def add_children_paced(self, parent: TreeNode, entries: Iterable[ScanEntry],
+                           on_done: Optional[Callable[[], None]] = None) -> List[TreeNode]:
+        """
+        Заполнение большой директории: узлы модели создаются сразу, а элементы
+        виджета вставляются пачками через after_idle, чтобы окно оставалось
+        отзывчивым. На время загрузки обновление полосы прокрутки отключается.
+        """
+        children = self.model.add_children(parent, entries)
+        parent_iid = str(parent.id)
+        if len(children) <= BULK_CHUNK:
+            self._insert_chunk(parent_iid, children)
+            if on_done is not None:
+                on_done()
+            return children
             
-    def include_items(self, items: list) -> None:
-        """Включение элементов"""
-        for item in items:
-            if item in self.excluded_items:
-                self.excluded_items.remove(item)
-                self.tree.item(item, tags=())
+        generation = self._generation
+        self._pending.add(parent.id)
+        self.tree.configure(yscrollcommand="")
+        
+        def step(start: int) -> None:
+            if generation != self._generation or parent_iid not in self._nodes:
+                return
+            self._insert_chunk(parent_iid, children[start:start + BULK_CHUNK])
+            if start + BULK_CHUNK < len(children):
+                self.tree.after_idle(step, start + BULK_CHUNK)
+                return
+            self._pending.discard(parent.id)
+            if not self._pending:
+                self._resume_scroll()
+            if on_done is not None:
+                on_done()
                 
-    def get_selected_items(self) -> list:
-        """Получение выбранных элементов"""
-        return self.tree.selection()
+        step(0)
+        return children
+        
+    def is_pending(self, node: TreeNode) -> bool:
+        """Проверка, вставляется ли ещё содержимое директории в виджет"""
+        return node.id in self._pending
+        
+    def _resume_scroll(self) -> None:
+        """Возобновление обновления полосы прокрутки"""
+        if self._suspended:
+            return
+        self.tree.configure(yscrollcommand=self.tree_scroll.set)
+        self.tree_scroll.set(*self.tree.yview())
+        
+    def _insert_chunk(self, parent_iid: str, nodes: List[TreeNode]) -> None:
+        """Вставка пачки узлов в конец директории одним вызовом Tcl"""
+        if not nodes:
+            return
+        items = []
+        for node in nodes:
+            iid = str(node.id)
+            icon = "🗀 " if node.is_dir else "📄 "
+            lazy = node.is_dir and self.lazy and not node.loaded
+            items.extend((iid, icon + node.name, "excluded" if node.excluded else "",
+                          self._values(node), int(lazy)))
+            self._nodes[iid] = node
+            if lazy:
+                self._placeholders.add(iid + PLACEHOLDER_SUFFIX)
+        self.tree.tk.call(BULK_INSERT_PROC, self.tree._w, parent_iid, PLACEHOLDER_TEXT, items)
+        
+    def insert_child(self, parent: TreeNode, entry: ScanEntry, index: int) -> TreeNode:
+        """Вставка одного элемента на заданную позицию"""
+        node = self.model.insert_child(parent, entry, index)
+        self._insert(str(parent.id), index, node)
+        return node
+        
+    def _insert(self, parent_iid: str, index, node: TreeNode) -> None:
+        """
+        Создание элемента виджета для узла. В ленивом режиме директория
+        получает временный дочерний элемент до первого раскрытия.
+        """
+        iid = str(node.id)
+        icon = "🗀 " if node.is_dir else "📄 "
+        tags = ("excluded",) if node.excluded else ()
+        self.tree.insert(parent_iid, index, iid=iid, text=icon + node.name, tags=tags,
+                         values=self._values(node))
+        self._nodes[iid] = node
+        if node.is_dir and self.lazy and not node.loaded:
+            self._placeholders.add(
+                self.tree.insert(iid, "end", iid=iid + PLACEHOLDER_SUFFIX, text=PLACEHOLDER_TEXT)
+            )
+            
+    def add_placeholders(self, nodes: Iterable[TreeNode]) -> None:
+        """
+        Временные дочерние элементы для директорий, не прочитанных при полном
+        сканировании (ограничения обхода, символические ссылки): такие директории
+        загружаются при раскрытии, как в ленивом режиме.
+        """
+        for node in nodes:
+            iid = str(node.id)
+            if node.loaded or iid not in self._nodes or self.tree.get_children(iid):
+                continue
+            self._placeholders.add(
+                self.tree.insert(iid, "end", iid=iid + PLACEHOLDER_SUFFIX, text=PLACEHOLDER_TEXT)
+            )
+            
+    def apply_filter(self, nodes: Iterable[TreeNode]) -> int:
+        """
+        Показ только узлов nodes и их предков: у каждого предка в виджете
+        остаются лишь ведущие к найденным узлам потомки (один вызов
+        set_children на директорию). Содержимое найденных директорий
+        не скрывается. Возвращает число показанных найденных узлов.
+        """
+        self.clear_filter()
+        root = self.model.root
+        if root is None:
+            return 0
+        # Для каждой директории-предка - id потомков, которые остаются видимыми
+        visible: Dict[int, Set[int]] = {root.id: set()}
+        count = 0
+        for node in nodes:
+            if str(node.id) not in self._nodes or node.parent is None:
+                continue
+            count += 1
+            child, parent = node, node.parent
+            while parent is not None:
+                ids = visible.setdefault(parent.id, set())
+                if child.id in ids:
+                    break
+                ids.add(child.id)
+                child, parent = parent, parent.parent
+        for parent_id, ids in visible.items():
+            iid = str(parent_id)
+            parent = self._nodes.get(iid)
+            if parent is None:
+                continue
+            self.tree.set_children(iid, *[str(child.id) for child in parent.children
+                                          if child.id in ids])
+            self.tree.item(iid, open=True)
+            self._filtered[iid] = parent
+        return count
+        
+    def clear_filter(self) -> None:
+        """Возврат скрытых фильтром элементов на их места"""
+        for iid, parent in self._filtered.items():
+            if iid not in self._nodes:
+                continue
+            self.tree.set_children(iid, *[str(child.id) for child in parent.children
+                                          if str(child.id) in self._nodes])
+        self._filtered.clear()
+        
+    def remove_node(self, node: TreeNode) -> None:
+        """Удаление узла вместе с поддеревом"""
+        # Скрытые фильтром элементы поддерева вместе с ним не удаляются
+        hidden = []
+        for child in self.model.iter_subtree(node):
+            self._nodes.pop(str(child.id), None)
+            if self._filtered.pop(str(child.id), None) is not None:
+                hidden.extend(str(c.id) for c in child.children)
+        iid = str(node.id)
+        self._placeholders.difference_update(self.tree.get_children(iid))
+        if node.id in self._pending:
+            self._pending.discard(node.id)
+            if not self._pending:
+                self._resume_scroll()
+        self.model.remove(node)
+        self.tree.delete(iid)
+        hidden = [item for item in hidden if self.tree.exists(item)]
+        if hidden:
+            self.tree.delete(*hidden)
+        
+    def node_of(self, item: str) -> Optional[TreeNode]:
+        """Узел модели для элемента виджета"""
+        return self._nodes.get(item)
+        
+    def get_loaded_directories(self) -> list:
+        """Пути директорий, содержимое которых загружено в дерево"""
+        return [node.path for node in self.model.iter_nodes() if node.is_dir and node.loaded]
+        
+    def _on_open(self, event=None) -> None:
+        """Загрузка содержимого директории при первом раскрытии"""
+        node = self.node_of(self.tree.focus())
+        if node is None or not node.is_dir or node.loaded:
+            return
+        iid = str(node.id)
+        for placeholder in self.tree.get_children(iid):
+            self._placeholders.discard(placeholder)
+            self.tree.delete(placeholder)
+        if self._loader is not None:
+            self._loader(node)
+            
+    def exclude_nodes(self, nodes: List[TreeNode]) -> int:
+        """Исключение узлов вместе с поддеревьями, возвращает число изменённых узлов"""
+        changed = self.model.set_excluded(nodes, True)
+        self._set_tag("add", "excluded", changed)
+        return len(changed)
+        
+    def include_nodes(self, nodes: List[TreeNode]) -> int:
+        """Включение узлов вместе с поддеревьями, возвращает число изменённых узлов"""
+        changed = self.model.set_excluded(nodes, False)
+        self._set_tag("remove", "excluded", changed)
+        return len(changed)
+        
+    def clear_exclusions(self) -> int:
+        """Снятие всех исключений, возвращает число включённых обратно узлов"""
+        count = self.model.clear_exclusions()
+        # Без списка элементов Tk снимает тег со всех элементов сразу
+        self.tree.tk.call(self.tree._w, "tag", "remove", "excluded")
+        return count
         
-    def get_item_text(self, item: str) -> str:
-        """Получение текста элемента"""
-        return self.tree.item(item)["text"]
+    def _set_tag(self, action: str, tag: str, nodes: List[TreeNode]) -> None:
+        """Установка или снятие тега одним вызовом Tcl для всех узлов"""
+        iids = [str(node.id) for node in nodes if str(node.id) in self._nodes]
+        if not iids:
+            return
+        try:
+            self.tree.tk.call(self.tree._w, "tag", action, tag, iids)
+        except tk.TclError:
+            # Tk до 8.6 не поддерживает "tag add/remove" - меняем теги поэлементно
+            for iid in iids:
+                tags = set(self.tree.item(iid, "tags"))
+                if action == "add":
+                    tags.add(tag)
+                else:
+                    tags.discard(tag)
+                self.tree.item(iid, tags=tuple(tags))
         
-    def get_item_values(self, item: str) -> list:
-        """Получение значений элемента"""
-        return self.tree.item(item)["values"]
+    def get_selected_nodes(self) -> List[TreeNode]:
+        """Получение выбранных узлов"""
+        return [self._nodes[item] for item in self.tree.selection() if item in self._nodes]
         
     def _show_context_menu(self, event) -> None:
         """Отображение контекстного меню"""
@@ -88,4 +474,4 @@ class TreeView:
     def _select_all(self, event=None) -> str:
         """Выделение всех элементов"""
         self.tree.selection_set(self.tree.get_children())
-        return "break"  # Предотвращаем стандартное поведение Ctrl+A 
\ No newline at end of file
+        return "break"  # Предотвращаем стандартное поведение Ctrl+A
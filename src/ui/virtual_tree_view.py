@@ -0,0 +1,609 @@
+import tkinter as tk
+from tkinter import ttk, font as tkfont
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from ..core.directory_scanner import ScanEntry
+from ..core.tree_model import TreeModel, TreeNode
+from .tree_view import STATS_COLUMNS, stats_values
+
+# Высота строки (совпадает со стилем Treeview в TreeView)
+ROW_HEIGHT = 25
+# Отступ одного уровня вложенности
+INDENT = "    "
+# Значки раскрытой, свёрнутой и нераскрываемой строки
+OPEN_MARKER = "▾ "
+CLOSED_MARKER = "▸ "
+LEAF_MARKER = "   "
+# Запас справа от значка, в пределах которого щелчок раскрывает директорию (пикс.)
+MARKER_SLACK = 24
+# Шаг прокрутки колесом мыши (строк)
+WHEEL_STEP = 3
+
+# Модификаторы в event.state
+SHIFT_MASK = 0x0001
+CONTROL_MASK = 0x0004
+
+
+class VirtualTreeView:
+    """
+    Виртуализированное отображение модели дерева каталогов.
+
+    В ttk.Treeview создаётся лишь столько строк, сколько помещается в окне;
+    при прокрутке в них выводятся другие узлы. Видимые узлы (потомки
+    раскрытых директорий) собираются в плоский список из TreeModel, поэтому
+    раскрытие директории с сотнями тысяч элементов не создаёт элементов Tk.
+    Выделение, исключение и контекстное меню работают с узлами модели.
+
+    Интерфейс совпадает с TreeView, главное окно использует любой из двух видов.
+    """
+
+    def __init__(self, parent: ttk.Frame, model: TreeModel):
+        self.model = model
+        self.tree = ttk.Treeview(
+            parent,
+            selectmode="none",
+            columns=[column for column, _, _ in STATS_COLUMNS],
+            displaycolumns=()
+        )
+        for column, heading, width in STATS_COLUMNS:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor=tk.E, stretch=False)
+        self.stats = False
+        self.tree_scroll = ttk.Scrollbar(parent, orient="vertical", command=self._on_scrollbar)
+
+        style = ttk.Style()
+        style.configure("Treeview", rowheight=ROW_HEIGHT)
+
+        self.tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.lazy = False
+        self._loader: Optional[Callable[[TreeNode], None]] = None
+
+        # Раскрытые директории; директории, загружаемые при раскрытии
+        # (ленивый режим или ограничения обхода); потомки, оставленные фильтром
+        self._open: Dict[int, TreeNode] = {}
+        self._unloaded: Set[int] = set()
+        self._filtered: Dict[int, List[TreeNode]] = {}
+
+        # Плоский список видимых узлов и первая показанная строка
+        self._rows: List[TreeNode] = []
+        self._rows_dirty = False
+        self._top = 0
+        # Число строк виджета
+        self._page = 0
+        self._render_job: Optional[str] = None
+
+        # Выделенные узлы (в порядке выделения), текущий и опорный для Shift
+        self._selected: Dict[int, TreeNode] = {}
+        self._focus: Optional[TreeNode] = None
+        self._focus_index = 0
+        self._anchor: Optional[TreeNode] = None
+
+        self._font = tkfont.nametofont("TkDefaultFont")
+        self.tree.tag_configure(
+            "selected",
+            background=style.lookup("Treeview", "background", ["selected"]) or "#3875d7",
+            foreground=style.lookup("Treeview", "foreground", ["selected"]) or "white"
+        )
+        self.tree.tag_configure("excluded", foreground="red")
+
+        self.popup_menu = tk.Menu(parent, tearoff=0)
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_to(self._top - WHEEL_STEP) or "break")
+        self.tree.bind("<Button-5>", lambda e: self._scroll_to(self._top + WHEEL_STEP) or "break")
+        self.tree.bind("<Button-1>", self._on_click)
+        for key, delta in (("Up", -1), ("Down", 1), ("Prior", "page-"), ("Next", "page+"),
+                           ("Home", "home"), ("End", "end")):
+            self.tree.bind(f"<{key}>", lambda e, d=delta: self._on_key_move(e, d))
+        self.tree.bind("<Right>", lambda e: self._expand_focus(True))
+        self.tree.bind("<Left>", lambda e: self._expand_focus(False))
+        self.tree.bind("<Return>", lambda e: self._toggle_focus())
+
+    def bind_events(self,
+                   on_exclude: Callable,
+                   on_include: Callable,
+                   on_add_pattern: Callable,
+                   on_double_click: Callable) -> None:
+        """Привязка обработчиков событий"""
+        self.popup_menu.add_command(label="Исключить выбранные (Del)", command=on_exclude)
+        self.popup_menu.add_command(label="Включить выбранные", command=on_include)
+        self.popup_menu.add_separator()
+        self.popup_menu.add_command(label="Добавить в шаблоны", command=on_add_pattern)
+
+        def double_click(event):
+            node = self._node_at(event.y)
+            if node is not None and not self._on_marker(node, event.x):
+                self._toggle(node)
+            on_double_click(event)
+            return "break"
+
+        self.tree.bind("<Button-3>", self._show_context_menu)
+        self.tree.bind("<Double-1>", double_click)
+        self.tree.bind("<Delete>", lambda e: on_exclude())
+        self.tree.bind("<Control-a>", self._select_all)
+
+    def set_loader(self, loader: Optional[Callable[[TreeNode], None]]) -> None:
+        """Установка функции загрузки содержимого директории при раскрытии"""
+        self._loader = loader
+
+    def destroy(self) -> None:
+        """Удаление виджетов (при смене режима отображения)"""
+        if self._render_job is not None:
+            self.tree.after_cancel(self._render_job)
+            self._render_job = None
+        self.popup_menu.destroy()
+        self.tree_scroll.destroy()
+        self.tree.destroy()
+
+    def clear(self) -> None:
+        """Очистка дерева"""
+        self.model.clear()
+        self._open.clear()
+        self._unloaded.clear()
+        self._filtered.clear()
+        self._selected.clear()
+        self._focus = self._anchor = None
+        self._top = 0
+        self._invalidate()
+
+    def show_stats(self, show: bool) -> None:
+        """Показ или скрытие колонок со статистикой"""
+        self.stats = show
+        self.tree.configure(displaycolumns=[c for c, _, _ in STATS_COLUMNS] if show else ())
+        self._schedule_render()
+
+    def update_totals(self, node: Optional[TreeNode]) -> None:
+        """Итоги выводятся при отрисовке - достаточно перерисовать строки"""
+        self._schedule_render()
+
+    def refresh_totals(self) -> None:
+        self._schedule_render()
+
+    # Изменение модели
+
+    def add_root(self, path: str) -> TreeNode:
+        """Добавление корневого элемента"""
+        node = self.model.set_root(path)
+        self._open[node.id] = node
+        self._invalidate()
+        return node
+
+    def add_workspace(self, paths: Iterable[str]) -> List[TreeNode]:
+        """Добавление рабочей области: служебный корень и корневые директории раскрыты"""
+        roots = self.model.set_workspace(paths)
+        self._open[self.model.root.id] = self.model.root
+        for node in roots:
+            self._open[node.id] = node
+        self._invalidate()
+        return roots
+
+    def show_model(self) -> None:
+        """Показ уже загруженной модели (при смене вида): раскрываются корни"""
+        root = self.model.root
+        if root is None:
+            return
+        self._open[root.id] = root
+        if root.is_workspace:
+            for node in root.children:
+                self._open[node.id] = node
+        self._invalidate()
+
+    def add_children(self, parent: TreeNode, entries: Iterable[ScanEntry]) -> List[TreeNode]:
+        """Заполнение директории прочитанными записями"""
+        children = self.model.add_children(parent, entries)
+        self._unloaded.discard(parent.id)
+        if parent.id in self._open:
+            self._invalidate()
+        else:
+            # У свёрнутой директории может смениться лишь значок раскрытия
+            self._schedule_render()
+        return children
+
+    @contextmanager
+    def suspended(self):
+        """Отрисовка и так откладывается до простоя, отключать нечего"""
+        yield
+
+    def add_children_paced(self, parent: TreeNode, entries: Iterable[ScanEntry],
+                           on_done: Optional[Callable[[], None]] = None) -> List[TreeNode]:
+        """Элементы виджета не создаются, поэтому большая директория заполняется сразу"""
+        children = self.add_children(parent, entries)
+        if on_done is not None:
+            on_done()
+        return children
+
+    def is_pending(self, node: TreeNode) -> bool:
+        return False
+
+    def insert_child(self, parent: TreeNode, entry: ScanEntry, index: int) -> TreeNode:
+        """Вставка одного элемента на заданную позицию"""
+        node = self.model.insert_child(parent, entry, index)
+        if parent.id in self._open:
+            self._invalidate()
+        else:
+            self._schedule_render()
+        return node
+
+    def add_placeholders(self, nodes: Iterable[TreeNode]) -> None:
+        """Непрочитанные директории загружаются при раскрытии, как в ленивом режиме"""
+        for node in nodes:
+            if node.is_dir and not node.loaded:
+                self._unloaded.add(node.id)
+        self._schedule_render()
+
+    def remove_node(self, node: TreeNode) -> None:
+        """Удаление узла вместе с поддеревом"""
+        removed = set()
+        for child in self.model.iter_subtree(node):
+            removed.add(child.id)
+            self._open.pop(child.id, None)
+            self._selected.pop(child.id, None)
+            self._filtered.pop(child.id, None)
+            self._unloaded.discard(child.id)
+        if self._focus is not None and self._focus.id in removed:
+            self._focus = None
+        if self._anchor is not None and self._anchor.id in removed:
+            self._anchor = None
+        parent = node.parent
+        if parent is not None and parent.id in self._filtered:
+            self._filtered[parent.id] = [c for c in self._filtered[parent.id] if c is not node]
+        self.model.remove(node)
+        self._invalidate()
+
+    def apply_filter(self, nodes: Iterable[TreeNode]) -> int:
+        """
+        Показ только узлов nodes и их предков; содержимое найденных
+        директорий не скрывается. Возвращает число найденных узлов.
+        """
+        self._filtered.clear()
+        root = self.model.root
+        if root is None:
+            return 0
+        visible: Dict[int, Set[int]] = {root.id: set()}
+        parents: Dict[int, TreeNode] = {root.id: root}
+        count = 0
+        for node in nodes:
+            if node.parent is None:
+                continue
+            count += 1
+            child, parent = node, node.parent
+            while parent is not None:
+                ids = visible.setdefault(parent.id, set())
+                parents[parent.id] = parent
+                if child.id in ids:
+                    break
+                ids.add(child.id)
+                child, parent = parent, parent.parent
+        for parent_id, ids in visible.items():
+            parent = parents[parent_id]
+            self._filtered[parent_id] = [child for child in parent.children if child.id in ids]
+            self._open[parent_id] = parent
+        self._top = 0
+        self._invalidate()
+        return count
+
+    def clear_filter(self) -> None:
+        """Возврат скрытых фильтром узлов"""
+        if self._filtered:
+            self._filtered.clear()
+            self._invalidate()
+
+    def node_of(self, item: str) -> Optional[TreeNode]:
+        """Узел модели, показанный в строке виджета"""
+        if not item.startswith("row"):
+            return None
+        index = self._top + int(item[3:])
+        return self._rows[index] if index < len(self._rows) else None
+
+    def get_loaded_directories(self) -> list:
+        """Пути директорий, содержимое которых загружено в дерево"""
+        return [node.path for node in self.model.iter_nodes() if node.is_dir and node.loaded]
+
+    def exclude_nodes(self, nodes: List[TreeNode]) -> int:
+        """Исключение узлов вместе с поддеревьями, возвращает число изменённых узлов"""
+        changed = self.model.set_excluded(nodes, True)
+        self._schedule_render()
+        return len(changed)
+
+    def include_nodes(self, nodes: List[TreeNode]) -> int:
+        """Включение узлов вместе с поддеревьями, возвращает число изменённых узлов"""
+        changed = self.model.set_excluded(nodes, False)
+        self._schedule_render()
+        return len(changed)
+
+    def clear_exclusions(self) -> int:
+        """Снятие всех исключений, возвращает число включённых обратно узлов"""
+        count = self.model.clear_exclusions()
+        self._schedule_render()
+        return count
+
+    def get_selected_nodes(self) -> List[TreeNode]:
+        """Получение выбранных узлов"""
+        return list(self._selected.values())
+
+    # Видимые строки
+
+    def _children(self, node: TreeNode) -> List[TreeNode]:
+        """Показываемые потомки директории (с учётом фильтра)"""
+        children = self._filtered.get(node.id)
+        return children if children is not None else (node.children or [])
+
+    def _expandable(self, node: TreeNode) -> bool:
+        if not node.is_dir:
+            return False
+        if not node.loaded:
+            return self.lazy or node.id in self._unloaded
+        return bool(self._children(node))
+
+    def _flatten(self) -> None:
+        """Сборка плоского списка видимых узлов"""
+        rows: List[TreeNode] = []
+        # Раскрытые директории по родителю
+        opened: Dict[int, List[TreeNode]] = {}
+        for node in self._open.values():
+            if node.parent is not None:
+                opened.setdefault(node.parent.id, []).append(node)
+        if self.model.root is not None:
+            self._visit(self.model.root, rows, opened)
+        self._rows = rows
+        self._rows_dirty = False
+
+    def _visit(self, node: TreeNode, rows: List[TreeNode],
+               opened: Dict[int, List[TreeNode]]) -> None:
+        rows.append(node)
+        if node.id not in self._open:
+            return
+        children = self._children(node)
+        # Раскрытых директорий обычно мало: потомки между ними добавляются срезами
+        positions = []
+        for child in opened.get(node.id, ()):
+            try:
+                positions.append((children.index(child), child))
+            except ValueError:
+                pass
+        start = 0
+        for position, child in sorted(positions, key=lambda item: item[0]):
+            rows.extend(children[start:position])
+            self._visit(child, rows, opened)
+            start = position + 1
+        rows.extend(children[start:])
+
+    def _invalidate(self) -> None:
+        """Список видимых узлов устарел"""
+        self._rows_dirty = True
+        self._schedule_render()
+
+    def _schedule_render(self) -> None:
+        """Отрисовка при ближайшем простое: серия изменений отрисовывается один раз"""
+        if self._render_job is None:
+            self._render_job = self.tree.after_idle(self._render)
+
+    def _render(self) -> None:
+        """Вывод видимых узлов в строки виджета"""
+        self._render_job = None
+        if self._rows_dirty:
+            self._flatten()
+        rows = self._rows
+        total = len(rows)
+        self._top = max(0, min(self._top, total - self._page))
+        root = self.model.root
+        for i in range(self._page):
+            index = self._top + i
+            if index >= total:
+                self.tree.item(f"row{i}", text="", tags=(), values=())
+                continue
+            node = rows[index]
+            tags = []
+            if node.id in self._selected:
+                tags.append("selected")
+            if node.excluded:
+                tags.append("excluded")
+            self.tree.item(f"row{i}", text=self._row_text(node, root), tags=tags,
+                           values=stats_values(node) if self.stats else ())
+        self._update_scrollbar()
+
+    def _row_text(self, node: TreeNode, root: Optional[TreeNode]) -> str:
+        if self._expandable(node):
+            marker = OPEN_MARKER if node.id in self._open else CLOSED_MARKER
+        else:
+            marker = LEAF_MARKER
+        if node is root:
+            return marker + node.display_name
+        icon = "🗀 " if node.is_dir else "📄 "
+        return INDENT * self._depth(node) + marker + icon + node.display_name
+
+    @staticmethod
+    def _depth(node: TreeNode) -> int:
+        depth = 0
+        while node.parent is not None:
+            depth += 1
+            node = node.parent
+        return depth
+
+    def _update_scrollbar(self) -> None:
+        total = len(self._rows)
+        if total <= self._page:
+            self.tree_scroll.set(0.0, 1.0)
+        else:
+            self.tree_scroll.set(self._top / total, (self._top + self._page) / total)
+
+    # Прокрутка
+
+    def _on_configure(self, event) -> None:
+        """Подбор числа строк виджета под его высоту (одна строка - заголовок)"""
+        page = max(1, event.height // ROW_HEIGHT - 1)
+        if page == self._page:
+            return
+        if page > self._page:
+            for i in range(self._page, page):
+                self.tree.insert("", "end", iid=f"row{i}")
+        else:
+            self.tree.delete(*[f"row{i}" for i in range(page, self._page)])
+        self._page = page
+        self._render()
+
+    def _scroll_to(self, top: int) -> None:
+        if self._rows_dirty:
+            self._flatten()
+        top = max(0, min(top, len(self._rows) - self._page))
+        if top != self._top:
+            self._top = top
+            self._render()
+
+    def _on_scrollbar(self, *args) -> None:
+        """Команда полосы прокрутки: moveto доля или scroll n units/pages"""
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self._rows)))
+        elif args[0] == "scroll":
+            step = self._page if args[2] == "pages" else 1
+            self._scroll_to(self._top + int(args[1]) * step)
+
+    def _on_wheel(self, event) -> str:
+        # Windows - кратно 120 на щелчок колеса, macOS - небольшие значения
+        steps = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self._scroll_to(self._top - steps * WHEEL_STEP)
+        return "break"
+
+    def _ensure_visible(self, index: int) -> None:
+        if index < self._top:
+            self._scroll_to(index)
+        elif index >= self._top + self._page:
+            self._scroll_to(index - self._page + 1)
+
+    # Выделение и раскрытие
+
+    def _node_at(self, y: int) -> Optional[TreeNode]:
+        return self.node_of(self.tree.identify_row(y))
+
+    def _on_marker(self, node: TreeNode, x: int) -> bool:
+        """Попадает ли щелчок на значок раскрытия"""
+        if not self._expandable(node):
+            return False
+        depth = 0 if node is self.model.root else self._depth(node)
+        return x < self._font.measure(INDENT * depth + OPEN_MARKER) + MARKER_SLACK
+
+    def _toggle(self, node: TreeNode) -> None:
+        """Раскрытие или сворачивание директории; первая загрузка - через loader"""
+        if not self._expandable(node) and node.id not in self._open:
+            return
+        if node.id in self._open:
+            del self._open[node.id]
+        else:
+            self._open[node.id] = node
+            if not node.loaded and self._loader is not None:
+                self._unloaded.discard(node.id)
+                self._loader(node)
+        self._invalidate()
+
+    def _index_of(self, node: TreeNode) -> Optional[int]:
+        """Номер строки узла (запомненный номер текущего узла проверяется первым)"""
+        if self._rows_dirty:
+            self._flatten()
+        rows = self._rows
+        if self._focus_index < len(rows) and rows[self._focus_index] is node:
+            return self._focus_index
+        try:
+            return rows.index(node)
+        except ValueError:
+            return None
+
+    def _select(self, index: int, extend: bool = False, toggle: bool = False) -> None:
+        """Выделение строки; extend - диапазон от опорной строки, toggle - Ctrl"""
+        node = self._rows[index]
+        if extend and self._anchor is not None:
+            anchor = self._index_of(self._anchor)
+            if anchor is None:
+                anchor = index
+            if not toggle:
+                self._selected.clear()
+            low, high = min(anchor, index), max(anchor, index)
+            for row in self._rows[low:high + 1]:
+                self._selected[row.id] = row
+        elif toggle:
+            if self._selected.pop(node.id, None) is None:
+                self._selected[node.id] = node
+            self._anchor = node
+        else:
+            self._selected = {node.id: node}
+            self._anchor = node
+        self._focus = node
+        self._focus_index = index
+        self._ensure_visible(index)
+        self._schedule_render()
+
+    def _on_click(self, event) -> str:
+        self.tree.focus_set()
+        node = self._node_at(event.y)
+        if node is None:
+            return "break"
+        if self._on_marker(node, event.x):
+            self._toggle(node)
+            return "break"
+        index = self._index_of(node)
+        if index is not None:
+            self._select(index, extend=bool(event.state & SHIFT_MASK),
+                         toggle=bool(event.state & CONTROL_MASK))
+        return "break"
+
+    def _on_key_move(self, event, delta) -> str:
+        """Перемещение текущей строки клавишами; с Shift - расширение выделения"""
+        if self._rows_dirty:
+            self._flatten()
+        if not self._rows:
+            return "break"
+        current = self._index_of(self._focus) if self._focus is not None else None
+        if current is None:
+            current = self._top
+        if delta == "page-":
+            index = current - self._page
+        elif delta == "page+":
+            index = current + self._page
+        elif delta == "home":
+            index = 0
+        elif delta == "end":
+            index = len(self._rows) - 1
+        else:
+            index = current + delta
+        index = max(0, min(index, len(self._rows) - 1))
+        self._select(index, extend=bool(event.state & SHIFT_MASK))
+        return "break"
+
+    def _expand_focus(self, expand: bool) -> str:
+        """Вправо - раскрыть директорию, влево - свернуть или перейти к родителю"""
+        node = self._focus
+        if node is None:
+            return "break"
+        if expand != (node.id in self._open) and (not expand or self._expandable(node)):
+            self._toggle(node)
+        elif not expand and node.parent is not None:
+            index = self._index_of(node.parent)
+            if index is not None:
+                self._select(index)
+        return "break"
+
+    def _toggle_focus(self) -> str:
+        if self._focus is not None:
+            self._toggle(self._focus)
+        return "break"
+
+    def _show_context_menu(self, event) -> None:
+        """Контекстное меню; щелчок вне выделения выделяет строку под курсором"""
+        node = self._node_at(event.y)
+        if node is not None and node.id not in self._selected:
+            index = self._index_of(node)
+            if index is not None:
+                self._select(index)
+        if self._selected:
+            self.popup_menu.post(event.x_root, event.y_root)
+
+    def _select_all(self, event=None) -> str:
+        """Выделение всех видимых строк"""
+        if self._rows_dirty:
+            self._flatten()
+        self._selected = {node.id: node for node in self._rows}
+        self._schedule_render()
+        return "break"
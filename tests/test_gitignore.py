@@ -0,0 +1,40 @@
+"""Учёт .gitignore: переключение режима сбрасывает цепочки правил"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.core.directory_scanner import DirectoryScanner
+
+
+class GitignoreToggleTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.root, ".git"))
+        for name in ("a.log", "b.tmp"):
+            open(os.path.join(self.root, name), "w").close()
+        self.write_rules("*.log\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write_rules(self, text):
+        with open(os.path.join(self.root, ".gitignore"), "w") as f:
+            f.write(text)
+
+    def names(self, scanner):
+        return {entry.name for entry in scanner.scan_entries(self.root)}
+
+    def test_rules_reread_after_toggle(self):
+        scanner = DirectoryScanner({".git"}, use_gitignore=True)
+        self.assertNotIn("a.log", self.names(scanner))
+        scanner.use_gitignore = False
+        self.write_rules("*.tmp\n")
+        scanner.use_gitignore = True
+        names = self.names(scanner)
+        self.assertIn("a.log", names)
+        self.assertNotIn("b.tmp", names)
+
+
+if __name__ == "__main__":
+    unittest.main()
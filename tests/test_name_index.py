@@ -0,0 +1,39 @@
+"""Поиск по индексу имён"""
+import unittest
+
+from src.core.directory_scanner import ScanEntry
+from src.core.tree_model import TreeModel
+
+
+class NameIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.model = TreeModel()
+        root = self.model.set_root("/r")
+        self.model.add_children(root, [
+            ScanEntry(name, "/r/" + name, False)
+            for name in ("main.py", "README.md", "setup.py", "x")
+        ])
+        self.index = self.model.index
+
+    def names(self, query):
+        return sorted(node.name for node in self.index.search(query))
+
+    def test_empty_query_finds_nothing(self):
+        self.assertEqual(self.index.search(""), [])
+        self.assertEqual(self.index.search("   "), [])
+        self.assertEqual(self.index.match_names(""), [])
+
+    def test_empty_literal_does_not_loop(self):
+        self.assertEqual(list(self.index._find("")), [])
+
+    def test_substring_and_glob(self):
+        self.assertEqual(self.names("PY"), ["main.py", "setup.py"])
+        self.assertEqual(self.names("*.md"), ["README.md"])
+        self.assertEqual(self.names("?"), ["x"])
+        # Уточнение предыдущего запроса
+        self.assertEqual(self.names("p"), ["main.py", "setup.py"])
+        self.assertEqual(self.names("up"), ["setup.py"])
+
+
+if __name__ == "__main__":
+    unittest.main()
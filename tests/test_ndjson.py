@@ -0,0 +1,44 @@
+"""NDJSON: записи нескольких корней различаются полем root"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.cli import main
+
+
+class CombinedNdjsonTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.roots = []
+        for name in ("one", "two"):
+            root = os.path.join(self.tmp, name)
+            os.mkdir(root)
+            open(os.path.join(root, "f"), "w").close()
+            self.roots.append(root)
+        self.out = os.path.join(self.tmp, "out.ndjson")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def records(self, *extra):
+        self.assertEqual(main([*self.roots, "-f", "ndjson", "-c", self.out, "-j", "1", *extra]), 0)
+        with open(self.out, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def test_records_carry_root(self):
+        records = self.records()
+        self.assertEqual([(r["root"], r["path"]) for r in records],
+                         [(self.roots[0], "."), (self.roots[0], "f"),
+                          (self.roots[1], "."), (self.roots[1], "f")])
+
+    def test_workspace_records_carry_root(self):
+        records = self.records("-w")
+        self.assertNotIn("root", records[0])
+        self.assertEqual([r["root"] for r in records[1:]],
+                         [self.roots[0], self.roots[0], self.roots[1], self.roots[1]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Параллельный обход: порядок как у последовательного, ограниченное число чтений"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from src.core.directory_scanner import DirectoryScanner, PREFETCH_PER_WORKER
+
+
+class CountingScanner(DirectoryScanner):
+    """Сканер, считающий начатые чтения директорий"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self.started = 0
+
+    def scan_entries(self, path):
+        with self._lock:
+            self.started += 1
+        return super().scan_entries(path)
+
+
+class ParallelWalkTest(unittest.TestCase):
+    def setUp(self):
+        # Широкое дерево: 50 директорий по 3 поддиректории с файлом
+        self.root = tempfile.mkdtemp()
+        for i in range(50):
+            for j in range(3):
+                directory = os.path.join(self.root, f"d{i}", f"s{j}")
+                os.makedirs(directory)
+                open(os.path.join(directory, "f"), "w").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_same_order_as_serial(self):
+        serial = list(DirectoryScanner(set()).walk(self.root))
+        parallel = list(DirectoryScanner(set(), workers=4).walk(self.root))
+        self.assertEqual(parallel, serial)
+
+    def test_in_flight_reads_are_bounded(self):
+        scanner = CountingScanner(set(), workers=2)
+        ahead = 0
+        # Потребитель медленнее пула: без ограничения пул прочитал бы сразу
+        # все поддиректории корня
+        for consumed, _ in enumerate(scanner.walk(self.root), 1):
+            time.sleep(0.001)
+            ahead = max(ahead, scanner.started - consumed)
+        self.assertLessEqual(ahead, 2 * PREFETCH_PER_WORKER)
+
+    def test_cancelled_walk_stops(self):
+        cancel = threading.Event()
+        walk = DirectoryScanner(set(), workers=4).walk(self.root, cancel)
+        next(walk)
+        cancel.set()
+        self.assertEqual(list(walk), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Профили: перенос profiles.json и обработка ошибок базы"""
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from src.core.profile_manager import ProfileManager
+
+
+class ProfileMigrationTest(unittest.TestCase):
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.json_file = os.path.join(self.config_dir, "profiles.json")
+        with open(self.json_file, "w", encoding="utf-8") as f:
+            json.dump({"Стандартный": [], "web": ["node_modules", "*.log"]}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.config_dir)
+
+    def test_read_without_migration(self):
+        manager = ProfileManager(self.config_dir, migrate=False)
+        self.assertTrue(manager.has_profile("web"))
+        self.assertEqual(manager.get_profile("web"), {"node_modules", "*.log"})
+        self.assertTrue(os.path.exists(self.json_file))
+        self.assertFalse(os.path.exists(manager.db_file))
+
+    def test_migration_by_default(self):
+        manager = ProfileManager(self.config_dir)
+        self.assertEqual(manager.get_profile("web"), {"node_modules", "*.log"})
+        self.assertFalse(os.path.exists(self.json_file))
+        self.assertTrue(os.path.exists(self.json_file + ".bak"))
+
+
+class ProfileErrorTest(unittest.TestCase):
+    def setUp(self):
+        # Вместо директории конфигурации - файл: база не открывается
+        fd, self.config_dir = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.config_dir)
+
+    def test_unavailable_database(self):
+        with redirect_stdout(io.StringIO()) as out:
+            manager = ProfileManager(self.config_dir)
+        self.assertEqual(manager.get_profile_names(), ["Стандартный"])
+        self.assertIn("Ошибка при чтении профилей", out.getvalue())
+        with self.assertRaisesRegex(Exception, "Не удалось сохранить профили"):
+            manager.save_profile("web", {"*.log"})
+        self.assertFalse(manager.has_profile("web"))
+
+
+if __name__ == "__main__":
+    unittest.main()
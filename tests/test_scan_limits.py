@@ -0,0 +1,47 @@
+"""Ограничения обхода: признак усечения при обходе и выгрузке"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.core.directory_scanner import DirectoryScanner, ScanLimits
+from src.core.structure_exporter import StructureExporter
+
+
+class EntryLimitTest(unittest.TestCase):
+    def setUp(self):
+        # Дерево a/f, b/g: пять элементов
+        self.root = tempfile.mkdtemp()
+        for directory, name in (("a", "f"), ("b", "g")):
+            os.mkdir(os.path.join(self.root, directory))
+            open(os.path.join(self.root, directory, name), "w").close()
+        self.out = os.path.join(self.root, "out.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def scanner(self, max_entries):
+        return DirectoryScanner(set(), limits=ScanLimits(max_entries=max_entries))
+
+    def test_export_at_exact_entry_limit_is_truncated(self):
+        # a, b и f исчерпывают лимит ровно, содержимое b не читается
+        exporter = StructureExporter(self.scanner(3))
+        exporter.export_path(self.root, self.out)
+        self.assertTrue(exporter.truncated)
+        with open(self.out, encoding="utf-8") as f:
+            self.assertNotIn("g", f.read().split())
+
+    def test_walk_at_exact_entry_limit_is_truncated(self):
+        scanner = self.scanner(3)
+        budget = scanner.budget(self.root)
+        list(scanner.walk(self.root, budget=budget))
+        self.assertTrue(budget.truncated)
+
+    def test_export_within_limit_is_not_truncated(self):
+        exporter = StructureExporter(self.scanner(5))
+        exporter.export_path(self.root, self.out)
+        self.assertFalse(exporter.truncated)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+"""
+Проверка времени запуска: импорт главного окна не должен загружать модули,
+отложенные до первого использования, и не должен заметно замедлиться
+(см. benchmarks/bench_startup.py). Дисплей не нужен - окно не создаётся.
+"""
+import unittest
+import importlib.util
+
+from benchmarks.bench_startup import DEFERRED_MODULES, STARTUP_MODULE, import_times, loaded_deferred
+
+# Верхняя граница времени импорта главного окна (мс): с большим запасом,
+# чтобы ловить лишь грубые регрессии, а не шум медленных машин
+IMPORT_TIME_LIMIT_MS = 1000
+IMPORT_RUNS = 3
+
+
+@unittest.skipIf(importlib.util.find_spec("tkinter") is None, "tkinter не установлен")
+class StartupImportTest(unittest.TestCase):
+    def test_deferred_modules_not_imported(self):
+        # Импорт выполняется в отдельном процессе, чтобы sys.modules был чистым
+        self.assertEqual(loaded_deferred(STARTUP_MODULE), [],
+                         f"при запуске загружаются модули из {DEFERRED_MODULES}")
+        
+    def test_import_time_bounded(self):
+        # Лучший из нескольких запусков, каждый в новом процессе
+        best = min(import_times(STARTUP_MODULE)[0] for _ in range(IMPORT_RUNS)) / 1000
+        self.assertLess(best, IMPORT_TIME_LIMIT_MS,
+                        f"импорт {STARTUP_MODULE} занимает {best:.0f} мс")
+
+
+if __name__ == "__main__":
+    unittest.main()
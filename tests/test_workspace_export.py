@@ -0,0 +1,52 @@
+"""Выгрузка рабочей области: вложенные корни не перечитываются с диска"""
+import os
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+
+from src.cli import export_workspace
+from src.core.directory_scanner import DirectoryScanner
+from src.core.structure_exporter import StructureExporter
+
+
+class CountingScanner(DirectoryScanner):
+    """Сканер, считающий чтения листингов с диска"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reads = Counter()
+
+    def _read_listing_cached(self, path):
+        self.reads[path] += 1
+        return super()._read_listing_cached(path)
+
+
+class NestedWorkspaceTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.inner = os.path.join(self.root, "inner")
+        os.makedirs(os.path.join(self.inner, "sub"))
+        open(os.path.join(self.inner, "sub", "f"), "w").close()
+        self.out = os.path.join(tempfile.mkdtemp(), "out.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+        shutil.rmtree(os.path.dirname(self.out))
+
+    def test_nested_root_listings_read_once(self):
+        scanner = CountingScanner(set())
+        StructureExporter(scanner).export_workspace([self.root, self.inner], self.out)
+        self.assertEqual(scanner.reads[self.inner], 1)
+        self.assertEqual(scanner.reads[os.path.join(self.inner, "sub")], 1)
+        self.assertIsNone(scanner.shared_listings)
+
+    def test_cli_export_lists_both_roots(self):
+        count, truncated = export_workspace([self.root, self.inner], set(), self.out)
+        self.assertFalse(truncated)
+        with open(self.out, encoding="utf-8") as f:
+            self.assertEqual(f.read().count("sub"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()